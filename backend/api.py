@@ -1,23 +1,67 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Response, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import joblib
 import pandas as pd
+import numpy as np
 import os
 import uvicorn
 import httpx # For Mock LLM
 from contextlib import asynccontextmanager
 import sys
 import json
+import threading
+import asyncio
 from google import genai
 from google.genai import types
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import load_and_preprocess_data, train_predictive_maintenance_model
 from data_manager import DataManager
+from snapshot_cache import SnapshotCache
+from prediction_cache import PredictionCache
+from serialization import (
+    encode_stations, compose_json_object, changes_to_json_bytes,
+    STATION_FORMATS, ARROW_STREAM_MEDIA_TYPE, ARROW_AVAILABLE
+)
+from tick_journal import TickJournal
+from tick_scheduler import TickScheduler, tick_interval_from_env
+from compiled_forest import CompiledForest
+from feature_spec import model_feature_names, build_feature_matrix, feature_frame, compile_encoders
+from spatial_index import StationGridIndex, cluster_by_grid, CLUSTER_MAX_ZOOM
+
+# Memory budget of the enriched stations cache (frames, encoded payloads, grid indexes)
+STATIONS_CACHE_BYTES = 128 * 1024 ** 2
 
 # Global variables to hold model state
-app_state = {}
+app_state = {
+    'model_version': 0,
+    # Enriched /api/stations payloads keyed by (DataManager snapshot key, model version)
+    'stations_cache': SnapshotCache(max_bytes=STATIONS_CACHE_BYTES),
+    # Per-station model outputs, only stations whose features changed are re-scored
+    'prediction_cache': PredictionCache(),
+    # Per-tick change masks for delta-encoded /api/simulation/tick responses
+    'tick_journal': TickJournal(max_lag=30),
+    'tick_lock': threading.Lock()
+}
+
+def _load_serving_model(model_path):
+    """
+    The model the API scores with. Prefers the flattened forest main.py exports next to the pickle
+    (no sklearn unpickling at startup); otherwise loads the pickle and flattens a random forest in memory.
+    """
+    compiled_path = os.path.join(os.path.dirname(model_path), 'compiled_forest.npz')
+    if os.path.exists(compiled_path) and (not os.path.exists(model_path) or os.path.getmtime(compiled_path) >= os.path.getmtime(model_path)):
+        return CompiledForest.load(compiled_path)
+    model = joblib.load(model_path)
+    if hasattr(model, 'estimators_') and hasattr(model, 'classes_'):
+        return CompiledForest.from_sklearn(model)
+    return model
+
+def _discard_stale_live_views(live_version):
+    """Evicts enriched live views computed before the live state's latest mutation."""
+    app_state['stations_cache'].discard(lambda key: key[0][0] == 'live' and key[0][-1] < live_version)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,8 +74,9 @@ async def lifespan(app: FastAPI):
         data_path = os.path.join(os.path.dirname(__file__), '..', 'ev_charging_station_data 2.csv')
         
         print("Loading Predictive Maintenance Model...")
-        app_state['model'] = joblib.load(model_path)
-        app_state['encoders'] = joblib.load(encoder_path)
+        app_state['model'] = _load_serving_model(model_path)
+        app_state['encoders'] = compile_encoders(joblib.load(encoder_path))
+        app_state['model_version'] += 1
         
         clusterer_path = os.path.join(os.path.dirname(__file__), '..', 'anomaly_clusterer.pkl')
         if os.path.exists(clusterer_path):
@@ -42,14 +87,21 @@ async def lifespan(app: FastAPI):
         
         print("Initializing DataManager...")
         app_state['db'] = DataManager(data_path, num_stations=150)
+        app_state['db'].live_change_callbacks.append(_discard_stale_live_views)
         app_state['db'].load_data()
         
+        # One server-side simulation clock shared by every connected dashboard
+        app_state['tick_scheduler'] = TickScheduler(_scheduled_tick, tick_interval_from_env())
+        app_state['tick_scheduler'].start()
+        
         print("Startup Complete!")
     except Exception as e:
         print(f"Error during startup: {e}")
         print("Did you run `python main.py` first to generate the .pkl files?")
     yield
     # Clean up here if needed
+    if app_state.get('tick_scheduler') is not None:
+        await app_state['tick_scheduler'].stop()
     print("Shutting down SNTRY AI backend...")
 
 app = FastAPI(title="SNTRY AI API", lifespan=lifespan)
@@ -67,126 +119,204 @@ app.add_middleware(
 def read_root():
     return {"message": "Welcome to the SNTRY AI Predictive Maintenance API"}
 
-def _enrich_stations_with_predictions(stations, db, model, encoders, clusterer):
-    prediction_batch = []
-    
-    for station in stations:
-        try:
-            features_df = db.get_station_features_for_prediction(df_row=pd.DataFrame([station]))
-            if features_df is None or features_df.empty:
-                continue
-            prediction_batch.append(features_df)
-        except Exception as e:
-            print(f"Error preparing row for {station.get('station_id')}: {e}")
-            
-    if prediction_batch:
-        try:
-            batch_df = pd.concat(prediction_batch, ignore_index=True)
-            for col, le in encoders.items():
-                if col in batch_df.columns:
-                    try:
-                        batch_df[col] = batch_df[col].astype(str)
-                        known_classes = set(le.classes_)
-                        batch_df[col] = batch_df[col].apply(lambda x: x if x in known_classes else str(le.classes_[0]))
-                        batch_df[col] = le.transform(batch_df[col])
-                    except Exception as e:
-                        print(f"Encoding Error on col {col}: {e}")
-            
-            expected_features = model.feature_names_in_ if hasattr(model, 'feature_names_in_') else None
-            if expected_features is not None:
-                for col in expected_features:
-                    if col not in batch_df.columns:
-                        batch_df[col] = 0
-                batch_df = batch_df[expected_features]          
-
-            predictions = model.predict(batch_df)
-            probabilities = model.predict_proba(batch_df)
-            classes = model.classes_
-            
-            cluster_preds = None
-            if clusterer is not None:
-                 try:
-                      cluster_preds = clusterer.predict(batch_df)
-                 except Exception as c_err:
-                      pass
-                      
-            cluster_reasons = {
-                0: "Traffic-Induced Overload (Wait Times > 60m)",
-                1: "Heat-Induced Hardware Degradation (Temp > 95°F)",
-                2: "Software/Network Disconnect (Low Utilization / Error)",
-                3: "General Hardware Failure (Routine Wear & Tear)"
-            }
-            
-            for i, station in enumerate(stations):
-                 station['predicted_status'] = predictions[i]
-                 
-                 risk = 0.0
-                 for j, cls_name in enumerate(classes):
-                      if cls_name in ['partial_outage', 'offline']:
-                           risk += probabilities[i][j]
-                 
-                 station['risk_score'] = float(risk)
-                 station['needs_maintenance'] = bool(risk > 0.45)
-                 
-                 if station['needs_maintenance'] and cluster_preds is not None:
-                      cid = int(cluster_preds[i])
-                      station['root_cause_diagnosis'] = cluster_reasons.get(cid, "Unknown Anomaly Pattern")
-                 else:
-                      station['root_cause_diagnosis'] = "Nominal"
-                
-        except Exception as e:
-            print(f"Error during batch prediction: {e}")
-            # Fallback if model fails
-            for station in stations:
-                station['risk_score'] = float(station.get('utilization_rate', 0.5) * 0.8)
-                station['needs_maintenance'] = bool(station['risk_score'] > 0.45)
+CLUSTER_REASONS = {
+    0: "Traffic-Induced Overload (Wait Times > 60m)",
+    1: "Heat-Induced Hardware Degradation (Temp > 95°F)",
+    2: "Software/Network Disconnect (Low Utilization / Error)",
+    3: "General Hardware Failure (Routine Wear & Tear)"
+}
+
+def _score_feature_rows(model, clusterer, X, names):
+    """Runs the model (and root-cause clusterer) on a feature batch: (predicted, risk, cluster or -1)."""
+    batch_df = feature_frame(X, names)
+    if hasattr(model, 'predict_with_proba'):
+        # Compiled forest: labels and probabilities from one traversal
+        predictions, probabilities = model.predict_with_proba(X)
     else:
-        # Fallback if no stations could be prepared
-        for station in stations:
-            # Simple heuristic fallback: high utilization = higher risk
-            risk_score = station.get('utilization_rate', 0.5) * 0.8
-            station['risk_score'] = float(risk_score)
+        predictions = model.predict(batch_df)
+        probabilities = model.predict_proba(batch_df)
+    failure_classes = np.isin(model.classes_, ['partial_outage', 'offline'])
+    risk = probabilities[:, failure_classes].sum(axis=1)
+    
+    cluster_preds = np.full(len(batch_df), -1, dtype=np.int64)
+    if clusterer is not None:
+         try:
+              # KMeans only accepts the float dtype its centers were fitted in
+              cluster_preds = clusterer.predict(batch_df.astype(clusterer.cluster_centers_.dtype, copy=False))
+         except Exception as c_err:
+              pass
+    return predictions, risk, cluster_preds
+
+def _enrich_stations_with_predictions(stations, db, model, encoders, clusterer):
+    """Returns a copy of the stations DataFrame with the ML prediction columns added."""
+    stations = stations.copy()
+    if stations.empty:
+        _apply_heuristic_risk(stations)
+        return stations
+        
+    try:
+        # One feature matrix for the whole fleet, in the model's column order
+        names = model_feature_names(model, stations.columns)
+        X = build_feature_matrix(stations, names, encoders)
+
+        # Only stations whose feature row changed since their last scoring go through the model
+        predictions, risk, cluster_preds = app_state['prediction_cache'].predict(
+            stations['station_id'].astype(str).tolist(), X, app_state['model_version'],
+            lambda X_dirty: _score_feature_rows(model, clusterer, X_dirty, names)
+        )
+        
+        # Whole-column assignments instead of mutating one station dict at a time
+        needs_maintenance = risk > 0.45
+        
+        stations['predicted_status'] = predictions
+        stations['risk_score'] = risk.astype(float)
+        stations['needs_maintenance'] = needs_maintenance
+        
+        reasons = pd.Series(cluster_preds).map(CLUSTER_REASONS).fillna("Unknown Anomaly Pattern").to_numpy()
+        diagnosis = np.where(needs_maintenance & (cluster_preds >= 0), reasons, "Nominal").astype(object)
+        stations['root_cause_diagnosis'] = diagnosis
             
-            # Create a boolean flag for easy frontend mapping (ensure it's native Python bool, not numpy.bool_)
-            station['needs_maintenance'] = bool(risk_score > 0.45)
+    except Exception as e:
+        print(f"Error during batch prediction: {e}")
+        # Fallback if model fails
+        _apply_heuristic_risk(stations)
             
     return stations
 
-@app.get("/api/stations", response_model=Dict[str, Any])
-def get_all_stations(timeframe: str = "0", start_date: str = None, end_date: str = None):
-    """Returns all stations, current predicted risk scores, and available timeframes for filtering."""
-    db: DataManager = app_state.get('db')
+def _apply_heuristic_risk(stations):
+    """Simple heuristic fallback: high utilization = higher risk."""
+    risk_score = stations['utilization_rate'].astype(float).fillna(0.5) * 0.8
+    stations['risk_score'] = risk_score
+    
+    # Create a boolean flag for easy frontend mapping
+    stations['needs_maintenance'] = risk_score > 0.45
+
+def _get_enriched_stations(db, timeframe="0", start_date=None, end_date=None):
+    """
+    Snapshot + ML enrichment for one view as a DataFrame, served from the versioned stations cache.
+    Any number of dashboards polling the same view between two mutations cost one computation.
+    """
     model = app_state.get('model')
     encoders = app_state.get('encoders')
     clusterer = app_state.get('clusterer')
     
-    if not db or not model:
-        raise HTTPException(status_code=500, detail="Model or Data not loaded.")
-        
-    response_data = db.get_all_stations(timeframe, start_date, end_date)
-    stations = response_data.get('stations', []) if isinstance(response_data, dict) else response_data
+    key = (db.snapshot_key(timeframe, start_date, end_date), app_state['model_version'], 'frame')
     
-    available_timeframes = []
-    if isinstance(response_data, dict) and 'available_timeframes' in response_data:
-        available_timeframes = response_data.get('available_timeframes', [])
-    elif isinstance(response_data, list):
-         stations = response_data
-         
-    if not available_timeframes and hasattr(db, 'raw_data') and db.raw_data is not None:
-         max_date = db.raw_data['timestamp'].max()
-         for i in range(6):
-            target_date = max_date - pd.DateOffset(months=i)
-            label = f"Today ({max_date.strftime('%b %d, %Y')})" if i == 0 else target_date.strftime('%B %Y')
-            available_timeframes.append({"id": str(i), "label": label})
+    def compute():
+        stations = db.get_stations_frame(timeframe, start_date, end_date)
+        if model and encoders:
+            stations = _enrich_stations_with_predictions(stations, db, model, encoders, clusterer)
+        return stations
+        
+    return app_state['stations_cache'].get_or_compute(key, compute)
+
+def _get_stations_payload(db, fmt="records", timeframe="0", start_date=None, end_date=None):
+    """The enriched view encoded once per wire format, cached next to the frame it came from."""
+    key = (db.snapshot_key(timeframe, start_date, end_date), app_state['model_version'], fmt)
+    return app_state['stations_cache'].get_or_compute(
+        key, lambda: encode_stations(_get_enriched_stations(db, timeframe, start_date, end_date), fmt)
+    )
+
+def _stations_response(fields, stations_payload, fmt):
+    """
+    Wraps an encoded stations payload. JSON formats splice it into the response object next to
+    `fields`. Arrow streams are returned as-is, with `fields` moved into an X-Sntry-Meta header.
+    """
+    if fmt == 'arrow':
+        return Response(
+            content=stations_payload,
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+            headers={"X-Sntry-Meta": json.dumps(fields)}
+        )
+    if fmt == 'columnar':
+        fields = dict(fields, format='columnar')
+    return Response(content=compose_json_object(fields, {"stations": stations_payload}), media_type="application/json")
 
+def _check_format(fmt):
+    if fmt not in STATION_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{fmt}'. Expected one of: {', '.join(STATION_FORMATS)}")
+    if fmt == 'arrow' and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="The Arrow format requires pyarrow on the server.")
 
-    # Run predictions on all stations to score them
-    stations = _enrich_stations_with_predictions(stations, db, model, encoders, clusterer)
+def _get_stations_grid(db, timeframe="0", start_date=None, end_date=None):
+    """Grid index over the enriched view's coordinates, cached next to the frame it indexes."""
+    key = (db.snapshot_key(timeframe, start_date, end_date), app_state['model_version'], 'grid')
+    def compute():
+        stations = _get_enriched_stations(db, timeframe, start_date, end_date)
+        return StationGridIndex(stations['latitude'].to_numpy(dtype=np.float64), stations['longitude'].to_numpy(dtype=np.float64))
+    return app_state['stations_cache'].get_or_compute(key, compute)
+
+def _parse_bbox(bbox):
+    """Parses "min_lon,min_lat,max_lon,max_lat" (the GeoJSON / map-library bounds order)."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(','))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'min_lon,min_lat,max_lon,max_lat'.")
+    if not (-90 <= min_lat <= max_lat <= 90) or not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise HTTPException(status_code=400, detail="bbox is out of range.")
+    return min_lat, min_lon, max_lat, max_lon
+
+def _viewport_response(db, fmt, timeframe, start_date, end_date, bbox, zoom):
+    """
+    Stations inside the map viewport. Below CLUSTER_MAX_ZOOM, stations sharing a grid cell are
+    sent as clusters (count, max risk, summed revenue at risk) and only lone stations as records.
+    """
+    stations = _get_enriched_stations(db, timeframe, start_date, end_date)
+    if bbox is not None:
+        stations = stations.iloc[_get_stations_grid(db, timeframe, start_date, end_date).query_bbox(*_parse_bbox(bbox))]
+
+    fields = {"timeframes": db.available_timeframes, "total": len(stations)}
+    if bbox is not None:
+        fields["bbox"] = bbox
+    if zoom is not None:
+        fields["zoom"] = zoom
+
+    if zoom is not None and zoom < CLUSTER_MAX_ZOOM:
+        if fmt == 'arrow':
+            raise HTTPException(status_code=400, detail=f"Clustered responses (zoom < {CLUSTER_MAX_ZOOM}) are JSON only.")
+        clusters, single_rows = cluster_by_grid(stations, zoom)
+        fields = dict(fields, format='columnar') if fmt == 'columnar' else fields
+        return Response(
+            content=compose_json_object(fields, {
+                "clusters": encode_stations(clusters, 'records'),
+                "stations": encode_stations(stations.iloc[single_rows], fmt)
+            }),
+            media_type="application/json"
+        )
+    return _stations_response(fields, encode_stations(stations, fmt), fmt)
+
+@app.get("/api/stations", response_model=Dict[str, Any])
+def get_all_stations(
+    timeframe: str = "0",
+    start_date: str = None,
+    end_date: str = None,
+    format: str = "records",
+    bbox: Optional[str] = None,
+    zoom: Optional[int] = None
+):
+    """
+    Returns all stations, current predicted risk scores, and available timeframes for filtering.
+    `format=columnar` returns the stations as a struct of arrays, `format=arrow` as an Arrow IPC stream.
+    `bbox=min_lon,min_lat,max_lon,max_lat` limits the response to the visible map area, and `zoom`
+    switches to server-side clusters below CLUSTER_MAX_ZOOM.
+    """
+    db: DataManager = app_state.get('db')
+    model = app_state.get('model')
     
-    return {
-        "timeframes": available_timeframes,
-        "stations": stations
-    }
+    if not db or not model:
+        raise HTTPException(status_code=500, detail="Model or Data not loaded.")
+    _check_format(format)
+    if zoom is not None and not 0 <= zoom <= 22:
+        raise HTTPException(status_code=400, detail="zoom must be between 0 and 22.")
+
+    if bbox is not None or zoom is not None:
+        return _viewport_response(db, format, timeframe, start_date, end_date, bbox, zoom)
+        
+    # Run predictions on all stations to score them (cached per data/model version, already encoded)
+    stations_payload = _get_stations_payload(db, format, timeframe, start_date, end_date)
+    
+    # Timeframes are materialized alongside the monthly rollups in DataManager.load_data
+    return _stations_response({"timeframes": db.available_timeframes}, stations_payload, format)
 
 @app.post("/api/simulate/{station_id}")
 def simulate_stress(station_id: str):
@@ -195,7 +325,9 @@ def simulate_stress(station_id: str):
     if not db:
         raise HTTPException(status_code=500, detail="Database not initialized")
         
-    result = db.simulate_stress_event(station_id)
+    # Same lock as the simulation ticks, so a manual action never interleaves with a tick
+    with app_state['tick_lock']:
+        result = db.simulate_stress(station_id)
     if not result:
         raise HTTPException(status_code=404, detail="Station not found")
         
@@ -208,33 +340,188 @@ def auto_heal(station_id: str):
     if not db:
         raise HTTPException(status_code=500, detail="Database not initialized")
         
-    result = db.apply_self_healing_pricing(station_id)
+    # Same lock as the simulation ticks, so a manual action never interleaves with a tick
+    with app_state['tick_lock']:
+        result = db.apply_self_healing_pricing(station_id)
     if not result:
          raise HTTPException(status_code=404, detail="Station not found or already healthy")
          
     return {"message": f"Self-healing applied for {station_id}", "data": result}
     
+def _advance_live_tick(db, timestamp):
+    """One live simulation tick, re-scored and recorded in the tick journal. Caller holds tick_lock."""
+    db.simulate_live_tick(timestamp, return_stations=False)
+    
+    # Re-enrich the new base state with updated ML predictions
+    stations = _get_enriched_stations(db, "0")
+    return app_state['tick_journal'].record(stations), stations
+
+def _latest_tick_state(db):
+    """The most recent tick version and the current enriched state, without advancing. Caller holds tick_lock."""
+    stations = _get_enriched_stations(db, "0")
+    journal: TickJournal = app_state['tick_journal']
+    if journal.version == 0:
+        # Nothing recorded yet, the loaded state becomes the first version clients can sync from
+        journal.record(stations)
+    return journal.version, stations
+
+def _tick_delta_json(version, since_version, changes):
+    return compose_json_object(
+        {"message": "Tick processed", "version": version, "full": False, "since_version": since_version},
+        {"changes": changes_to_json_bytes(changes)}
+    )
+
+def _scheduled_tick():
+    """Scheduler callback: advance once and encode the event every stream subscriber receives, as (version, payload)."""
+    db: DataManager = app_state['db']
+    with app_state['tick_lock']:
+        version, stations = _advance_live_tick(db, pd.Timestamp.now(tz='UTC').isoformat())
+        changes = app_state['tick_journal'].changes_since(version - 1, stations)
+        if changes is None:
+            return version, compose_json_object(
+                {"message": "Tick processed", "version": version, "full": True},
+                {"stations": _get_stations_payload(db, "records", "0")}
+            )
+        return version, _tick_delta_json(version, version - 1, changes)
+
 @app.post("/api/simulation/tick")
-def simulation_tick(timestamp: str = Body(..., embed=True)):
-    """Advances the simulation by simulating live data based on historical averages and applying auto-healing."""
+def simulation_tick(
+    timestamp: str = Body(..., embed=True),
+    since_version: Optional[int] = Body(None, embed=True),
+    format: str = Body("records", embed=True)
+):
+    """
+    Advances the simulation by simulating live data based on historical averages and applying auto-healing.
+    Every tick gets a version number. Clients that pass the `since_version` they hold receive only the
+    (station, field) values that changed since then, or the full list if they are too far behind.
+    `format` picks the encoding of full station lists (deltas are always columnar JSON).
+    While the server-side scheduler is running the simulation only advances on its cadence,
+    and this returns the latest tick instead of advancing it again.
+    """
     db: DataManager = app_state.get('db')
-    model = app_state.get('model')
-    encoders = app_state.get('encoders')
-    clusterer = app_state.get('clusterer')
     
     if not db:
         raise HTTPException(status_code=500, detail="Database not initialized")
+    _check_format(format)
         
-    db.simulate_live_tick(timestamp)
+    scheduler = app_state.get('tick_scheduler')
+    with app_state['tick_lock']:
+        if scheduler is not None and scheduler.running:
+            version, stations = _latest_tick_state(db)
+        else:
+            version, stations = _advance_live_tick(db, timestamp)
+        journal: TickJournal = app_state['tick_journal']
+        changes = journal.changes_since(since_version, stations) if since_version is not None else None
+        
+        if changes is None:
+            return _stations_response(
+                {"message": "Tick processed", "version": version, "full": True},
+                _get_stations_payload(db, format, "0"),
+                format
+            )
+        
+        content = _tick_delta_json(version, since_version, changes)
+    return Response(content=content, media_type="application/json")
+
+# Comment line sent to idle stream subscribers so proxies don't close the connection
+STREAM_KEEPALIVE_SECONDS = 15
+
+@app.get("/api/simulation/stream")
+async def simulation_stream(request: Request):
+    """
+    Server-Sent Events feed of the scheduler's ticks: a full snapshot first, then one `tick` event per
+    scheduled tick, a delta against the previous version. A client whose version doesn't match an
+    event's `since_version` missed something and should re-fetch /api/stations.
+    """
+    db: DataManager = app_state.get('db')
+    scheduler = app_state.get('tick_scheduler')
     
-    # Re-enrich the new base state with updated ML predictions
-    response_data = db.get_all_stations("0")
-    stations = response_data.get('stations', []) if isinstance(response_data, dict) else response_data
+    if not db:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+    if scheduler is None or not scheduler.running:
+        raise HTTPException(status_code=503, detail="The tick scheduler is disabled (SNTRY_TICK_SECONDS=0).")
+        
+    # Subscribed before the snapshot is taken, so no tick can fall between the two
+    queue = scheduler.subscribe()
+    
+    def snapshot():
+        with app_state['tick_lock']:
+            version, _ = _latest_tick_state(db)
+            return version, compose_json_object(
+                {"message": "Snapshot", "version": version, "full": True},
+                {"stations": _get_stations_payload(db, "records", "0")}
+            )
     
+    async def events():
+        try:
+            snapshot_version, payload = await asyncio.to_thread(snapshot)
+            yield b"event: tick\ndata: " + payload + b"\n\n"
+            while not await request.is_disconnected():
+                try:
+                    version, payload = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                # Ticks that finished before the snapshot was taken are already part of it
+                if version <= snapshot_version:
+                    continue
+                yield b"event: tick\ndata: " + payload + b"\n\n"
+        finally:
+            scheduler.unsubscribe(queue)
+            
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# Upper bound for one fast-forward request (a year of hourly ticks is 8760)
+MAX_FAST_FORWARD_STEPS = 10_000
+
+def _score_fleet(stations):
+    """Model view of the fleet for fast-forward scenarios: how many stations the model flags."""
+    db: DataManager = app_state.get('db')
+    model = app_state.get('model')
+    encoders = app_state.get('encoders')
     if model and encoders:
-        stations = _enrich_stations_with_predictions(stations, db, model, encoders, clusterer)
+        stations = _enrich_stations_with_predictions(stations, db, model, encoders, app_state.get('clusterer'))
+    else:
+        stations = stations.copy()
+        _apply_heuristic_risk(stations)
+    return {
+        "stations_needing_maintenance": int(stations['needs_maintenance'].sum()),
+        "mean_risk_score": round(float(stations['risk_score'].mean()), 4)
+    }
+
+@app.post("/api/simulation/fast_forward")
+def simulation_fast_forward(
+    steps: int = Body(..., embed=True),
+    start_timestamp: Optional[str] = Body(None, embed=True),
+    step_minutes: int = Body(60, embed=True),
+    seed: Optional[int] = Body(None, embed=True),
+    commit: bool = Body(False, embed=True),
+    score_every: int = Body(0, embed=True)
+):
+    """
+    Runs `steps` simulation ticks in one request for what-if scenarios (e.g. a week of heat wave).
+    Returns per-step series and KPIs. With commit=false (default) the live state is left untouched.
+    score_every=N re-scores the fleet with the model every N steps; by default nothing is re-scored.
+    """
+    db: DataManager = app_state.get('db')
+    
+    if not db:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+    if not 1 <= steps <= MAX_FAST_FORWARD_STEPS:
+        raise HTTPException(status_code=400, detail=f"steps must be between 1 and {MAX_FAST_FORWARD_STEPS}")
+    if step_minutes <= 0:
+        raise HTTPException(status_code=400, detail="step_minutes must be positive")
         
-    return {"message": "Tick processed", "stations": stations}
+    with app_state['tick_lock']:
+        result = db.fast_forward(
+            steps, start_timestamp=start_timestamp, step_minutes=step_minutes, seed=seed,
+            commit=commit, score_fn=_score_fleet if score_every > 0 else None, score_every=score_every
+        )
+        if commit:
+            # Committed runs land as one new tick version for delta clients
+            result["version"] = app_state['tick_journal'].record(_get_enriched_stations(db, "0"))
+            
+    return result
 
 @app.get("/api/logs")
 def get_system_logs():
@@ -245,8 +532,11 @@ def get_system_logs():
     return {"logs": db.logs}
     
 @app.post("/api/train")
-async def retrain_model():
-    """Triggers a background execution of main.py to retrain the ML models, then reloads them."""
+def retrain_model():
+    """
+    Triggers a background execution of main.py to retrain the ML models, then reloads them.
+    A plain def, so FastAPI runs the blocking training run in its threadpool, off the event loop.
+    """
     import subprocess
     import os
     
@@ -254,9 +544,14 @@ async def retrain_model():
         # Get path to main.py
         main_script_path = os.path.join(os.path.dirname(__file__), '..', 'main.py')
         
-        # Run main.py synchronously to ensure models are overwritten before we load them
+        # Run main.py synchronously to ensure models are overwritten before we load them.
+        # --streaming keeps the trainer's memory flat so it can run next to the API workers.
         print("Starting ML Retraining Pipeline...")
-        process = subprocess.run(['python', main_script_path], capture_output=True, text=True, check=True)
+        process = subprocess.run(
+            ['python', main_script_path, '--streaming'],
+            cwd=os.path.dirname(os.path.abspath(main_script_path)),
+            capture_output=True, text=True, check=True
+        )
         print("ML Retraining Finished.")
         
         # Reload models into memory
@@ -264,15 +559,25 @@ async def retrain_model():
         encoder_path = os.path.join(os.path.dirname(__file__), '..', 'label_encoders.pkl')
         clusterer_path = os.path.join(os.path.dirname(__file__), '..', 'anomaly_clusterer.pkl')
         
-        app_state['model'] = joblib.load(model_path)
-        app_state['encoders'] = joblib.load(encoder_path)
-        if os.path.exists(clusterer_path):
-             app_state['clusterer'] = joblib.load(clusterer_path)
-             
-        # Reload full data table so risk scores reflect the new models
-        db = app_state.get('db')
-        if db: 
-            db.load_data()
+        model = _load_serving_model(model_path)
+        encoders = compile_encoders(joblib.load(encoder_path))
+        clusterer = joblib.load(clusterer_path) if os.path.exists(clusterer_path) else app_state.get('clusterer')
+        
+        # Swapped under the tick lock, so no tick scores with a half-reloaded model or data table
+        with app_state['tick_lock']:
+            app_state['model'] = model
+            app_state['encoders'] = encoders
+            app_state['clusterer'] = clusterer
+            
+            # Every cached enrichment was scored by the old model
+            app_state['model_version'] += 1
+            app_state['stations_cache'].clear()
+            app_state['prediction_cache'].clear(app_state['model_version'])
+                 
+            # Reload full data table so risk scores reflect the new models
+            db = app_state.get('db')
+            if db: 
+                db.load_data()
         
         return {
             "message": "Models retrained and reloaded successfully in memory.",
@@ -289,24 +594,18 @@ async def retrain_model():
 async def chat_with_data_pigeon(message: str = Body(..., embed=True), api_key: str = Body(None, embed=True)):
     """LLM Endpoint for the Triaging Agent using Google Gemini."""
     db: DataManager = app_state.get('db')
-    model = app_state.get('model')
-    encoders = app_state.get('encoders')
-    clusterer = app_state.get('clusterer')
-    
-    # We must explicitly call get_all_stations() with '0' to get the processed logic
-    response_data = db.get_all_stations("0")
-    stations = response_data.get('stations', []) if isinstance(response_data, dict) else response_data
     
-    # Run the ML models to assign risk scores and anomaly clusters to this station batch
-    if model and encoders:
-        stations = _enrich_stations_with_predictions(stations, db, model, encoders, clusterer)
+    # We must explicitly call get_all_stations() with '0' to get the processed logic,
+    # with the ML models' risk scores and anomaly clusters (shared with the dashboards' cache)
+    stations = json.loads(_get_stations_payload(db, "records", "0"))
     
     # Now we can safely filter by risk_score
-    high_risk_stations = [s for s in stations if s.get('risk_score', 0) > 0.4]
+    high_risk_stations = [s for s in stations if (s.get('risk_score') or 0) > 0.4]
     
     # Also grab the highest revenue at risk station just in case they ask about routing/money
+    # (missing readings are null in the payload and count as 0)
     if stations:
-         highest_rev_station = sorted(stations, key=lambda x: x.get('current_price', 0) * x.get('utilization_rate', 0) * x.get('avg_session_duration_mins', 0), reverse=True)[0]
+         highest_rev_station = sorted(stations, key=lambda x: (x.get('current_price') or 0) * (x.get('utilization_rate') or 0) * (x.get('avg_session_duration_mins') or 0), reverse=True)[0]
          if highest_rev_station not in high_risk_stations:
              high_risk_stations.append(highest_rev_station)
         
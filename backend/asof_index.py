@@ -0,0 +1,80 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry_store import float64_values
+
+class StationAsOfIndex:
+    """
+    Per-station view of the historical telemetry: every station's rows sorted by timestamp,
+    with running sums of utilization_rate. Answers "latest row per station inside a time window
+    plus the mean utilization of the rows before it" with one binary search per station
+    instead of filtering and grouping the whole raw table.
+    """
+    def __init__(self, raw_data):
+        station_codes, self.station_ids = pd.factorize(raw_data['station_id'])
+
+        # Stable sort keeps each station's rows in their existing chronological order
+        self.row_order = np.argsort(station_codes, kind='stable')
+        self.timestamps = raw_data['timestamp'].to_numpy(dtype='datetime64[ns]').view('int64')[self.row_order]
+
+        # Prefix sums (skipping NaNs, like DataFrame.mean does) turn any window mean into two lookups
+        utilization = float64_values(raw_data['utilization_rate'])[self.row_order]
+        valid = ~np.isnan(utilization)
+        self.util_prefix = np.concatenate([[0.0], np.cumsum(np.where(valid, utilization, 0.0))])
+        self.valid_prefix = np.concatenate([[0], np.cumsum(valid)])
+
+        counts = np.bincount(station_codes, minlength=len(self.station_ids))
+        self.ends = np.cumsum(counts)
+        self.starts = self.ends - counts
+
+    def _search(self, value, side):
+        """Vectorized np.searchsorted run independently inside every station's timestamp range."""
+        lo = self.starts.copy()
+        hi = self.ends.copy()
+        last = len(self.timestamps) - 1
+        while True:
+            active = lo < hi
+            if not active.any():
+                return lo
+            mid = (lo + hi) // 2
+            mid_values = self.timestamps[np.minimum(mid, last)]
+            go_right = (mid_values < value) if side == 'left' else (mid_values <= value)
+            go_right &= active
+            lo = np.where(go_right, mid + 1, lo)
+            hi = np.where(active & ~go_right, mid, hi)
+
+    def _bounds(self, start, end):
+        lo = self.starts if start is None else self._search(pd.Timestamp(start).value, 'left')
+        hi = self.ends if end is None else self._search(pd.Timestamp(end).value, 'right')
+        return lo, hi
+
+    def has_rows(self, start=None, end=None):
+        """True if any station has at least one row inside [start, end]."""
+        lo, hi = self._bounds(start, end)
+        return bool((hi > lo).any())
+
+    def snapshot(self, start=None, end=None):
+        """
+        For the window [start, end] (either bound optional) returns:
+        - rows: positions in raw_data of each station's latest row, in chronological order
+        - hist_avg: mean utilization of that station's earlier rows inside the window (NaN if none)
+        - prior_counts: how many earlier rows each station had inside the window
+        Stations with no rows in the window are left out.
+        """
+        lo, hi = self._bounds(start, end)
+        has_rows = hi > lo
+        first = lo[has_rows]
+        latest = hi[has_rows] - 1
+
+        sums = self.util_prefix[latest] - self.util_prefix[first]
+        counts = self.valid_prefix[latest] - self.valid_prefix[first]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            hist_avg = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+        # Same ordering groupby('station_id').tail(1) produces on the timestamp-sorted table
+        rows = self.row_order[latest]
+        order = np.argsort(rows, kind='stable')
+        return rows[order], hist_avg[order], (latest - first)[order]
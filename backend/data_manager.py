@@ -1,13 +1,66 @@
+import copy
 import pandas as pd
 import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from asof_index import StationAsOfIndex
+from sample_pools import StationSlotPools
+from live_store import LiveStationStore
+from spatial_index import StationSpatialIndex
+from snapshot_cache import SnapshotCache
+from serialization import frame_to_records
+from telemetry_store import list_station_ids, load_station_rows, compact_frame, expand_compact_dtypes, float64_values
+from feature_spec import feature_names
+
+# "Today" plus the five previous months offered by the dashboard's timeframe picker
+NUM_BUILTIN_TIMEFRAMES = 6
+
+# Batched auto-healing: how many nearby healthy stations can absorb a stressed station's traffic,
+# and how much extra load each of them takes per tick (same +30% / 85% limits as a single reroute)
+REROUTE_NEIGHBORS = 8
+REROUTE_MAX_BUMP = 0.3
+REROUTE_MAX_UTILIZATION = 0.85
+# Reroute discounts never take a price below this (the cheapest tariff in the data, discounted once)
+REROUTE_MIN_PRICE = 0.14
+
+# Memory budget of the per-view snapshot cache
+SNAPSHOT_CACHE_BYTES = 128 * 1024 ** 2
+
+def _discounted_price(price):
+    """A rerouted station's price after the 30% discount, floored at REROUTE_MIN_PRICE (lower prices are kept)."""
+    return np.maximum(price * 0.70, np.minimum(price, REROUTE_MIN_PRICE))
+
+def _revenue_at_risk(price, utilization, session_mins):
+    """
+    User formula: current_price × utilization_rate × avg_session_duration_mins, in float64.
+    Compacted float32 inputs are widened first so the result carries no float32 noise.
+    """
+    return float64_values(price) * float64_values(utilization) * float64_values(session_mins)
 
 class DataManager:
-    def __init__(self, filepath, num_stations=100):
+    def __init__(self, filepath, num_stations=100, station_ids=None):
         self.filepath = filepath
         self.num_stations = num_stations
+        # Explicit stations to load instead of a random sample (e.g. one shard of a sharded simulation)
+        self.station_ids = station_ids
         self.raw_data = None
-        self.active_stations = None
+        self.live = None
+        self.available_timeframes = []
+        self.timeframe_rollups = {}
         self.logs = []
+        self._station_positions = {}
+        
+        # Snapshot cache keys embed these, so bumping a version invalidates the affected views
+        self.data_version = 0  # raw_data, changes only on load_data
+        self.live_version = 0  # active_stations, changes on every simulation/healing mutation
+        self._snapshot_cache = SnapshotCache(max_bytes=SNAPSHOT_CACHE_BYTES)
+        # Called with the new live_version after every live mutation (e.g. to evict downstream caches)
+        self.live_change_callbacks = []
+        
+        # Randomness of the live simulation (fast_forward can run on its own seeded generator)
+        self._sim_rng = np.random.default_rng()
         
     def log_event(self, action, details):
         """Records a system event (like surge pricing). Keeps the last 50 logs."""
@@ -23,95 +76,121 @@ class DataManager:
     def load_data(self):
         """Loads a subset of stations to act as our 'live' database."""
         print(f"Loading data from {self.filepath}...")
-        df = pd.read_csv(self.filepath)
+        if self.station_ids is not None:
+            sampled_station_ids = np.asarray(self.station_ids, dtype=object)
+        else:
+            # Get a list of unique stations from the cache's station index and sample them
+            unique_stations = list_station_ids(self.filepath)
+            sample_size = min(self.num_stations, len(unique_stations))
+            sampled_station_ids = np.random.choice(unique_stations, sample_size, replace=False)
         
-        # Ensure timestamp is parsed properly
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-        # Get a list of unique stations and sample them
-        unique_stations = df['station_id'].unique()
-        sample_size = min(self.num_stations, len(unique_stations))
-        sampled_station_ids = np.random.choice(unique_stations, sample_size, replace=False)
+        # Read only those stations' rows (timestamps already parsed, sorted chronologically),
+        # so startup cost scales with num_stations rather than the size of the CSV
+        self.raw_data = load_station_rows(self.filepath, sampled_station_ids)
         
-        # Filter for only those stations and sort chronologically
-        self.raw_data = df[df['station_id'].isin(sampled_station_ids)].copy()
-        self.raw_data = self.raw_data.sort_values('timestamp')
+        # Every uvicorn worker holds its own copy of this table, so keep it as small as possible
+        self.raw_data = compact_frame(self.raw_data, name='raw_data')
         
-        # Calculate historical averages (excluding the very last most recent timestamp)
-        # We group by station_id and take all but the last row
-        historical_data = self.raw_data.groupby('station_id').apply(lambda x: x.iloc[:-1]).reset_index(drop=True)
-        hist_utilization = historical_data.groupby('station_id')['utilization_rate'].mean().reset_index()
-        hist_utilization = hist_utilization.rename(columns={'utilization_rate': 'historical_utilization_avg'})
+        # Per-station sorted timestamps + utilization prefix sums for every snapshot query
+        self.asof_index = StationAsOfIndex(self.raw_data)
         
-        # Keep the most recent timestamp for each station to act as 'current state'
-        self.active_stations = self.raw_data.groupby('station_id').tail(1).copy()
+        # (station, month, hour) pools of historical readings for the live simulation
+        self.sample_pools = StationSlotPools(self.raw_data)
         
-        # Merge in the historical trend analysis
-        self.active_stations = pd.merge(self.active_stations, hist_utilization, on='station_id', how='left')
+        # Keep the most recent timestamp for each station to act as 'current state',
+        # with the historical trend (mean utilization excluding that last row) alongside it
+        stations = self._snapshot_frame(fill_missing_history=False)
         
         # Ensure 'current_price' exists and is strictly positive
-        if 'current_price' not in self.active_stations.columns:
-            self.active_stations['current_price'] = 0.45
+        if 'current_price' not in stations.columns:
+            stations['current_price'] = 0.45
         else:
             # If there's missing data for pricing, fill with standard $0.45 pricing
-            self.active_stations['current_price'] = self.active_stations['current_price'].fillna(0.45)
+            stations['current_price'] = stations['current_price'].fillna(0.45)
             # Ensure no prices are secretly 0.0 in the CSV which breaks the multiplier logic
-            self.active_stations.loc[self.active_stations['current_price'] <= 0.0, 'current_price'] = 0.45
+            stations.loc[stations['current_price'] <= 0.0, 'current_price'] = 0.45
 
         # Assign the requested Revenue at Risk metric for routing priority
         # User formula: current_price × utilization_rate × avg_session_duration_mins
-        self.active_stations['revenue_at_risk_daily'] = (
-            self.active_stations['current_price'] * 
-            self.active_stations['utilization_rate'] * 
-            self.active_stations['avg_session_duration_mins']
+        stations['revenue_at_risk_daily'] = _revenue_at_risk(
+            stations['current_price'], stations['utilization_rate'], stations['avg_session_duration_mins']
         )
+        # Mutable live state: array-backed store, with active_stations as its DataFrame view
+        self.active_stations = compact_frame(stations, name='active_stations')
+        self._build_station_positions()
         
+        # Great-circle neighbor search for rerouting (station coordinates never change)
+        self.spatial_index = StationSpatialIndex(self.live.array('latitude'), self.live.array('longitude'))
+        
+        self._build_timeframe_rollups()
+        
+        self.data_version += 1
+        self._mark_live_changed()
+        self._snapshot_cache.clear()
         print(f"Loaded {len(self.active_stations)} active stations.")
         
-    def get_all_stations(self, timeframe='0', start_date=None, end_date=None):
-        """Returns the state of all tracked stations based on the requested timeframe or explicit date bounds."""
-        if self.active_stations is None:
-            self.load_data()
-            
+    @property
+    def active_stations(self):
+        """
+        The live state as a DataFrame: a zero-copy view over the LiveStationStore in self.live.
+        Read-only, every mutation goes through self.live.
+        """
+        return self.live.to_frame() if self.live is not None else None
+        
+    @active_stations.setter
+    def active_stations(self, frame):
+        self.live = LiveStationStore(frame) if frame is not None else None
+        
+    def _build_station_positions(self):
+        """
+        station_id -> row position in the live store. Stations never move while the live state mutates
+        (only load_data replaces the table), so every single-station operation is one dict lookup.
+        """
+        self._station_positions = {station_id: idx for idx, station_id in enumerate(self.live.values('station_id'))}
+        
+    def _station_idx(self, station_id):
+        """Row position of a station in the live store, or None if it isn't tracked."""
+        return self._station_positions.get(station_id)
+        
+    def _mark_live_changed(self):
+        """Call after any mutation of active_stations so cached live snapshots are no longer served."""
+        self.live_version += 1
+        # Live snapshots of older versions can never be looked up again
+        self._snapshot_cache.discard(lambda key: key[0] == 'live')
+        for callback in self.live_change_callbacks:
+            callback(self.live_version)
+        
+    def _build_timeframe_rollups(self):
+        """
+        Materializes the dashboard's built-in timeframes ("Today" plus the five previous months) once
+        per load: their labels and a per-station snapshot table for each prior month, so switching
+        timeframes in the UI is a lookup instead of a recomputation.
+        """
         max_date = self.raw_data['timestamp'].max()
         
-        # Calculate available timeframes dynamically based on the max date
-        available_timeframes = []
-        for i in range(6):
+        self.available_timeframes = []
+        self.timeframe_rollups = {}
+        for i in range(NUM_BUILTIN_TIMEFRAMES):
             target_date = max_date - pd.DateOffset(months=i)
             label = f"Today ({max_date.strftime('%b %d, %Y')})" if i == 0 else target_date.strftime('%B %Y')
-            available_timeframes.append({"id": str(i), "label": label})
-            
+            self.available_timeframes.append({"id": str(i), "label": label})
+            if i > 0:
+                # None when the dataset doesn't reach back that far (served from the live state)
+                self.timeframe_rollups[i] = self._snapshot_frame(end=target_date)
+        
+    def _resolve_view(self, timeframe='0', start_date=None, end_date=None):
+        """
+        Works out which view a request asks for: ('live',), a built-in ('timeframe', months_ago)
+        or an arbitrary historical ('window', start, end).
+        """
         # Custom Date Range Override
         if start_date and end_date:
             try:
                 start_dt = pd.to_datetime(start_date)
                 end_dt = pd.to_datetime(end_date)
-                
-                past_data = self.raw_data[(self.raw_data['timestamp'] >= start_dt) & (self.raw_data['timestamp'] <= end_dt)]
-                
-                if not past_data.empty:
-                    target_stations = past_data.groupby('station_id').tail(1).copy()
-                    
-                    historical_data = past_data.groupby('station_id').apply(lambda x: x.iloc[:-1]).reset_index(drop=True)
-                    if not historical_data.empty:
-                        hist_utilization = historical_data.groupby('station_id')['utilization_rate'].mean().reset_index()
-                        hist_utilization = hist_utilization.rename(columns={'utilization_rate': 'historical_utilization_avg'})
-                        target_stations = pd.merge(target_stations, hist_utilization, on='station_id', how='left')
-                    else:
-                        target_stations['historical_utilization_avg'] = target_stations['utilization_rate']
-                    
-                    target_stations['revenue_at_risk_daily'] = (
-                        target_stations['current_price'] * 
-                        target_stations['utilization_rate'] * 
-                        target_stations['avg_session_duration_mins']
-                    )
-                else:
-                    target_stations = self.active_stations.copy()
             except Exception as e:
                 print(f"Date Parsing Error: {e}")
-                target_stations = self.active_stations.copy()
+                return ('live',)
         else:
             # Fall back to the predefined monthly timeframes
             try:
@@ -119,242 +198,468 @@ class DataManager:
             except ValueError:
                 months_ago = 0
                 
-            if months_ago > 0:
-                cutoff = max_date - pd.DateOffset(months=months_ago)
-                past_data = self.raw_data[self.raw_data['timestamp'] <= cutoff]
-                
-                if not past_data.empty:
-                    target_stations = past_data.groupby('station_id').tail(1).copy()
-                    
-                    historical_data = past_data.groupby('station_id').apply(lambda x: x.iloc[:-1]).reset_index(drop=True)
-                    if not historical_data.empty:
-                        hist_utilization = historical_data.groupby('station_id')['utilization_rate'].mean().reset_index()
-                        hist_utilization = hist_utilization.rename(columns={'utilization_rate': 'historical_utilization_avg'})
-                        target_stations = pd.merge(target_stations, hist_utilization, on='station_id', how='left')
-                    else:
-                        target_stations['historical_utilization_avg'] = target_stations['utilization_rate']
-                    
-                    target_stations['revenue_at_risk_daily'] = (
-                        target_stations['current_price'] * 
-                        target_stations['utilization_rate'] * 
-                        target_stations['avg_session_duration_mins']
-                    )
-                else:
-                    target_stations = self.active_stations.copy()
-            else:
-                target_stations = self.active_stations.copy()
-        
-        # Clean up data for JSON serialization (convert NaN to None, numpy types to native)
-        df_clean = target_stations.replace({np.nan: None})
-        
-        # Convert numpy booleans and integers to python native types
-        for col in df_clean.columns:
-            if df_clean[col].dtype == 'bool' or df_clean[col].dtype.name == 'bool':
-                df_clean[col] = df_clean[col].astype(bool)
-            elif pd.api.types.is_integer_dtype(df_clean[col]):
-                df_clean[col] = df_clean[col].astype(int)
-            elif pd.api.types.is_float_dtype(df_clean[col]):
-                df_clean[col] = df_clean[col].astype(float)
-                
-        return df_clean.to_dict(orient='records')
+            if months_ago <= 0:
+                return ('live',)
+            if months_ago in self.timeframe_rollups:
+                if self.timeframe_rollups[months_ago] is None:
+                    return ('live',)
+                return ('timeframe', months_ago)
+            start_dt = None
+            end_dt = self.raw_data['timestamp'].max() - pd.DateOffset(months=months_ago)
+            
+        # Windows without any data fall back to the live state
+        if not self.asof_index.has_rows(start=start_dt, end=end_dt):
+            return ('live',)
+        return ('window', start_dt, end_dt)
+        
+    def snapshot_key(self, timeframe='0', start_date=None, end_date=None):
+        """
+        Normalized cache key for a stations request: the view it resolves to plus the version of
+        the data that view is computed from. Historical views only change on load_data,
+        the live view changes on every tick, stress test or healing action.
+        """
+        if self.active_stations is None:
+            self.load_data()
+            
+        view = self._resolve_view(timeframe, start_date, end_date)
+        if view[0] == 'live':
+            return view + (self.live_version,)
+        return view + (self.data_version,)
+        
+    def get_stations_frame(self, timeframe='0', start_date=None, end_date=None):
+        """
+        Returns the requested view as a DataFrame (one row per station, compact dtypes).
+        The frame is shared with the snapshot cache, so treat it as read-only.
+        """
+        key = self.snapshot_key(timeframe, start_date, end_date)
+        return self._snapshot_cache.get_or_compute(key, lambda: self._build_frame(key))
+        
+    def get_all_stations(self, timeframe='0', start_date=None, end_date=None):
+        """Returns the state of all tracked stations based on the requested timeframe or explicit date bounds."""
+        return frame_to_records(self.get_stations_frame(timeframe, start_date, end_date))
+        
+    def _build_frame(self, key):
+        if key[0] == 'timeframe':
+            return self.timeframe_rollups[key[1]]
+        if key[0] == 'window':
+            return self._snapshot_frame(start=key[1], end=key[2])
+        # active_stations keeps mutating in place, the cached view has to be a copy
+        return self.active_stations.copy()
+        
+    def _snapshot_frame(self, start=None, end=None, fill_missing_history=True):
+        """
+        Builds the per-station snapshot (latest row inside [start, end] plus the mean utilization of
+        the rows before it) from the as-of index. Returns None if no station has data in the window.
+        """
+        rows, hist_avg, prior_counts = self.asof_index.snapshot(start=start, end=end)
+        if len(rows) == 0:
+            return None
+            
+        snapshot = self.raw_data.iloc[rows].reset_index(drop=True)
+        if fill_missing_history and not prior_counts.any():
+            # Only one row per station in this window, so its own reading is the whole history
+            snapshot['historical_utilization_avg'] = float64_values(snapshot['utilization_rate'])
+        else:
+            snapshot['historical_utilization_avg'] = hist_avg
+            
+        if 'current_price' in snapshot.columns:
+            snapshot['revenue_at_risk_daily'] = _revenue_at_risk(
+                snapshot['current_price'], snapshot['utilization_rate'], snapshot['avg_session_duration_mins']
+            )
+        return snapshot
+        
+    def _station_record(self, idx):
+        """Returns one active station as a JSON-friendly dict."""
+        return expand_compact_dtypes(self.active_stations.loc[[idx]]).replace({np.nan: None}).iloc[0].to_dict()
         
     def get_station_features_for_prediction(self, station_id=None, df_row=None):
         """Prepares a row of data exactly as the ML model expects it."""
         if df_row is None:
             if self.active_stations is None:
                 self.load_data()
-            df_row = self.active_stations[self.active_stations['station_id'] == station_id].copy()
+            idx = self._station_idx(station_id)
+            df_row = self.active_stations.loc[[idx]].copy() if idx is not None else self.active_stations.iloc[0:0]
             
         if df_row.empty:
             return None
             
-        # The exact columns dropped during training in main.py
-        columns_to_drop = [
-            'station_id', 'station_name', 'timestamp', 'city', 'state',
-            'latitude', 'longitude', 'amenities_nearby', 
-            'ports_available', 'ports_occupied', 'ports_out_of_service',
-            'station_status', 'revenue_at_risk_daily' # Drop our added column and the target
-        ]
-        
-        features = df_row.drop(columns=columns_to_drop, errors='ignore')
-        return features
+        # The model's features, as defined by the spec shared with training in main.py
+        return df_row[feature_names(df_row.columns)]
 
     def simulate_stress(self, station_id):
         """Artificially spikes utilization and temperature to demonstrate predictive failure."""
         if self.active_stations is None:
             self.load_data()
             
-        idx = self.active_stations.index[self.active_stations['station_id'] == station_id].tolist()
-        if not idx:
+        idx = self._station_idx(station_id)
+        if idx is None:
             return None
             
         # Spike the metrics
-        idx = idx[0]
-        self.active_stations.at[idx, 'utilization_rate'] = 0.98
-        self.active_stations.at[idx, 'temperature_f'] = 105.0
-        self.active_stations.at[idx, 'estimated_wait_time_mins'] = 45.0
+        self.live.set('utilization_rate', idx, 0.98)
+        self.live.set('temperature_f', idx, 105.0)
+        self.live.set('estimated_wait_time_mins', idx, 45.0)
+        self._mark_live_changed()
         
-        return self.active_stations.loc[idx].replace({np.nan: None}).to_dict()
+        return self._station_record(idx)
         
     def apply_self_healing_pricing(self, station_id):
-        """Simulates dynamic pricing hike to lower demand on a stressed station, while dropping the price of a nearby healthy node to reroute traffic."""
+        """
+        Simulates dynamic pricing hike to lower demand on a stressed station, while dropping the price of a nearby healthy node to reroute traffic.
+        """
         if self.active_stations is None:
             self.load_data()
             
         # Find the stressed station
-        stressed_idx = self.active_stations.index[self.active_stations['station_id'] == station_id].tolist()
-        if not stressed_idx:
+        stressed_idx = self._station_idx(station_id)
+        if stressed_idx is None:
             return None
             
-        stressed_idx = stressed_idx[0]
-        stressed_lat = self.active_stations.at[stressed_idx, 'latitude']
-        stressed_lon = self.active_stations.at[stressed_idx, 'longitude']
+        stressed_lat = self.live.get_float('latitude', stressed_idx)
+        stressed_lon = self.live.get_float('longitude', stressed_idx)
         
         # 1. Surge Pricing on Stressed Station
-        current_price = self.active_stations.at[stressed_idx, 'current_price']
-        new_price = current_price * 1.75 # 75% surge
-        self.active_stations.at[stressed_idx, 'current_price'] = new_price
-        
-        # The higher price mathematically lowers utilization and wait times in our simulation
-        old_util = self.active_stations.at[stressed_idx, 'utilization_rate']
-        self.active_stations.at[stressed_idx, 'utilization_rate'] = max(0.20, old_util - 0.40) # Drastically cut traffic
-        self.active_stations.at[stressed_idx, 'estimated_wait_time_mins'] = 2.0
+        current_price, new_price = self._surge_price(stressed_idx)
         
         # 2. Find closest healthy station to reroute traffic
-        # Healthy: utilization < 0.6
-        healthy_mask = self.active_stations['utilization_rate'] < 0.6
-        # don't select the stressed one
-        healthy_mask.loc[stressed_idx] = False
+        nearest_idx, _ = self._nearest_healthy(stressed_lat, stressed_lon, exclude_idx=stressed_idx)
         
-        healthy_stations = self.active_stations[healthy_mask].copy()
-        
-        if not healthy_stations.empty:
-            # Calculate simple euclidian distance for nearest neighbor
-            healthy_stations['dist'] = np.sqrt(
-                (healthy_stations['latitude'] - stressed_lat)**2 + 
-                (healthy_stations['longitude'] - stressed_lon)**2
-            )
-            nearest_idx = healthy_stations['dist'].idxmin()
-            
-            # Lower price at the nearest healthy station by 30% to attract drivers
-            healthy_price = self.active_stations.at[nearest_idx, 'current_price']
-            self.active_stations.at[nearest_idx, 'current_price'] = healthy_price * 0.70
-            
-            # Attracting drivers raises its utilization
-            self.active_stations.at[nearest_idx, 'utilization_rate'] = min(0.85, self.active_stations.at[nearest_idx, 'utilization_rate'] + 0.3)
+        if nearest_idx is not None:
+            healthy_price, discounted_price = self._reroute_discount(nearest_idx)
             
             self.log_event("AUTO_SURGE_PRICING", {
-                "stressed_station": self.active_stations.loc[stressed_idx]['station_name'],
+                "stressed_station": self.live.get_str('station_name', stressed_idx),
                 "stressed_price_increase": f"${current_price:.2f} ➔ ${new_price:.2f}",
-                "rerouted_station": self.active_stations.loc[nearest_idx]['station_name'],
-                "rerouted_price_decrease": f"${healthy_price:.2f} ➔ ${self.active_stations.at[nearest_idx, 'current_price']:.2f}"
+                "rerouted_station": self.live.get_str('station_name', nearest_idx),
+                "rerouted_price_decrease": f"${healthy_price:.2f} ➔ ${discounted_price:.2f}"
             })
             
             return {
-                "stressed_station": self.active_stations.loc[stressed_idx].replace({np.nan: None}).to_dict(),
-                "rerouted_station": self.active_stations.loc[nearest_idx].replace({np.nan: None}).to_dict()
+                "stressed_station": self._station_record(stressed_idx),
+                "rerouted_station": self._station_record(nearest_idx)
             }
             
         self.log_event("AUTO_SURGE_PRICING_NO_REROUTE", {
-            "stressed_station": self.active_stations.loc[stressed_idx]['station_name'],
+            "stressed_station": self.live.get_str('station_name', stressed_idx),
             "stressed_price_increase": f"${current_price:.2f} ➔ ${new_price:.2f}",
             "rerouted_station": "None",
             "rerouted_price_decrease": "N/A"
         })
             
         return {
-             "stressed_station": self.active_stations.loc[stressed_idx].replace({np.nan: None}).to_dict(),
+             "stressed_station": self._station_record(stressed_idx),
              "rerouted_station": None
         }
 
-    def simulate_live_tick(self, timestamp_str):
+    def _surge_price(self, idx):
+        """Surge pricing on a stressed station (+75%), which drastically cuts its traffic. Returns (old, new) price."""
+        live = self.live
+        current_price = live.get_float('current_price', idx)
+        new_price = current_price * 1.75 # 75% surge
+        live.set('current_price', idx, new_price)
+        
+        # The higher price mathematically lowers utilization and wait times in our simulation
+        old_util = live.get_float('utilization_rate', idx)
+        live.set('utilization_rate', idx, max(0.20, old_util - 0.40)) # Drastically cut traffic
+        live.set('estimated_wait_time_mins', idx, 2.0)
+        self._mark_live_changed()
+        return current_price, new_price
+        
+    def _nearest_healthy(self, lat, lon, exclude_idx=None):
+        """Closest station with utilization < 60% to (lat, lon). Returns (row position, distance in km) or (None, inf)."""
+        # Healthy: utilization < 0.6
+        healthy_mask = self.live.array('utilization_rate') < 0.6
+        if exclude_idx is not None:
+            # don't select the stressed one
+            healthy_mask[exclude_idx] = False
+            
+        # Haversine nearest neighbor from the spatial index instead of a planar distance to every station
+        rows, dist_km = self.spatial_index.nearest(lat, lon, allowed=healthy_mask, k=1)
+        if len(rows) == 0:
+            return None, np.inf
+        return int(rows[0]), float(dist_km[0])
+        
+    def _reroute_discount(self, idx):
+        """Lowers a healthy station's price by 30% (down to REROUTE_MIN_PRICE) to attract drivers. Returns (old, new) price."""
+        live = self.live
+        healthy_price = live.get_float('current_price', idx)
+        live.set('current_price', idx, float(_discounted_price(healthy_price)))
+        
+        # Attracting drivers raises its utilization
+        live.set('utilization_rate', idx, min(0.85, live.get_float('utilization_rate', idx) + 0.3))
+        self._mark_live_changed()
+        return healthy_price, live.get_float('current_price', idx)
+        
+    def _draw_historical_samples(self, target_month, target_hour, rng=None):
         """
-        Advances the simulation by simulating live data based on historical averages 
-        at the same time last year, then applies a small chance of randomness for surges.
+        Draws one random historical (utilization_rate, temperature_f) reading per active station
+        among its rows from the given month and hour. Returns (utilization, temperature, has_sample)
+        arrays aligned with active_stations; stations without such rows get NaN and has_sample=False.
+        """
+        codes = self.sample_pools.station_codes(self.active_stations['station_id'])
+        values, has_sample = self.sample_pools.draw(codes, target_month, target_hour, rng)
+        return values['utilization_rate'], values['temperature_f'], has_sample
+        
+    def _simulate_step(self, current_dt, rng):
+        """
+        The part of a tick that touches every station independently: historical draw plus noise,
+        then random traffic surges. Returns how many stations surged.
         """
-        if self.active_stations is None:
-            self.load_data()
-            
-        try:
-            current_dt = pd.to_datetime(timestamp_str)
-        except Exception:
-            current_dt = pd.Timestamp.now()
-            
         target_month = current_dt.month
         target_hour = current_dt.hour
         
-        # Filter raw data for similar month and hour historicals
-        hist_data = self.raw_data[(self.raw_data['timestamp'].dt.month == target_month) & 
-                                  (self.raw_data['timestamp'].dt.hour == target_hour)]
-                                  
-        for idx, row in self.active_stations.iterrows():
-            station_id = row['station_id']
-            
-            # 1. Base the new metrics historically
-            if not hist_data.empty:
-                station_hist = hist_data[hist_data['station_id'] == station_id]
-                if not station_hist.empty:
-                    sample = station_hist.sample(1).iloc[0]
-                    base_util = sample['utilization_rate']
-                    base_temp = sample['temperature_f']
-                else:
-                    base_util = row['utilization_rate']
-                    base_temp = row['temperature_f']
-            else:
-                base_util = row['utilization_rate']
-                base_temp = row['temperature_f']
-                
-            # 2. Add very small randomness
-            noise_util = np.random.normal(0, 0.2)
-            new_util = max(0.0, min(1.0, base_util + noise_util))
-            new_temp = base_temp + np.random.normal(0, 2)
-            
-            self.active_stations.at[idx, 'utilization_rate'] = new_util
-            self.active_stations.at[idx, 'temperature_f'] = new_temp
-            
-            # Recalculate revenue at risk matching the formula
-            self.active_stations.at[idx, 'revenue_at_risk_daily'] = (
-                self.active_stations.at[idx, 'current_price'] * 
-                new_util * 
-                self.active_stations.at[idx, 'avg_session_duration_mins']
-            )
+        # 1. Base the new metrics historically: one random reading per station from the same
+        # month and hour, falling back to the station's current reading if it has none (or the
+        # drawn row is missing that reading)
+        hist_util, hist_temp, has_hist = self._draw_historical_samples(target_month, target_hour, rng)
+        live = self.live
+        base_util = np.where(has_hist & ~np.isnan(hist_util), hist_util, live.array('utilization_rate'))
+        base_temp = np.where(has_hist & ~np.isnan(hist_temp), hist_temp, live.array('temperature_f'))
+        
+        # 2. Add very small randomness
+        num_stations = len(live)
+        new_util = np.clip(base_util + rng.normal(0, 0.2, num_stations), 0.0, 1.0)
+        new_temp = base_temp + rng.normal(0, 2, num_stations)
+        
+        # Written in place, in each column's own dtype
+        live.assign('utilization_rate', new_util)
+        live.assign('temperature_f', new_temp)
+        
+        # Recalculate revenue at risk matching the formula
+        live.assign('revenue_at_risk_daily', _revenue_at_risk(
+            live.array('current_price'), live.array('utilization_rate'), live.array('avg_session_duration_mins')
+        ))
+
+        self._mark_live_changed()
 
         # 3. Ambient Random Surge (The "Problem Generator")
         # 10% chance per tick to artificially force an extreme utilization spike on a GROUP of stations
-        if np.random.random() < 0.05:
-            healthy_pool = self.active_stations[self.active_stations['utilization_rate'] < 0.50]
+        surged = 0
+        if rng.random() < 0.05:
+            healthy_pool = np.flatnonzero(live.array('utilization_rate') < 0.50)
             # Pick a random number of stations to stress out simultaneously (1 to 5)
-            num_victims = np.random.randint(1, min(6, len(healthy_pool) + 1))
+            num_victims = rng.integers(1, min(6, len(healthy_pool) + 1))
             
-            if not healthy_pool.empty:
-                victims = healthy_pool.sample(n=num_victims)
+            if len(healthy_pool):
+                victims = healthy_pool[rng.choice(len(healthy_pool), size=num_victims, replace=False)]
                 
-                for _, random_victim in victims.iterrows():
-                    idx = self.active_stations.index[self.active_stations['station_id'] == random_victim['station_id']].tolist()[0]
-                    
+                for idx in victims:
                     # Force a massive, sudden surge in traffic/wait time
-                    surge_utilization = np.random.uniform(0.95, 1.0)
-                    self.active_stations.at[idx, 'utilization_rate'] = surge_utilization
-                    self.active_stations.at[idx, 'estimated_wait_time_mins'] = 45.0
-                    self.active_stations.at[idx, 'temperature_f'] = random_victim['temperature_f'] + 20.0 # Heats up
+                    surge_utilization = rng.uniform(0.95, 1.0)
+                    live.set('utilization_rate', idx, surge_utilization)
+                    live.set('estimated_wait_time_mins', idx, 45.0)
+                    live.set('temperature_f', idx, live.get_float('temperature_f', idx) + 20.0) # Heats up
+                    self._mark_live_changed()
+                    surged += 1
                     
                     self.log_event("TRAFFIC_SURGE_DETECTED", {
-                        "station": random_victim['station_name'],
+                        "station": live.get_str('station_name', idx),
                         "load": round(surge_utilization * 100, 1),
                         "warning": f"Unexpected traffic spike! Utilization hit {round(surge_utilization * 100, 1)}%."
                     })
 
-        # 4. Systematic Auto-Healing Sweep 
-        # Scan the network for stations that have crossed the pain threshold and haven't been dynamically priced yet
+        return surged
+        
+    def _critical_mask(self):
+        """Stations due for auto-healing, shared by the batched sweep and the sharded coordinator."""
         # Pain Threshold: Utilization > 60%
-        critical_stations = self.active_stations[
-            (self.active_stations['utilization_rate'] > 0.60) & 
-            (self.active_stations['current_price'] < 0.50) # Assuming <$0.50 means it hasn't been surged recently
-        ]
-        
-        # Limit auto-heal to 2 stations per tick so the cascading effects happen gradually over time
-        for _, station in critical_stations.head(2).iterrows():
-            self.apply_self_healing_pricing(station['station_id'])
+        utilization = self.live.array('utilization_rate')
+        price = self.live.array('current_price')
+        return (utilization > 0.60) & (price < 0.50) # Assuming <$0.50 means it hasn't been surged recently
+        
+    def _critical_station_ids(self, limit=2):
+        """Stations that have crossed the pain threshold and haven't been dynamically priced yet, in fleet order."""
+        critical_rows = np.flatnonzero(self._critical_mask())[:limit]
+        return [self.live.get_str('station_id', idx) for idx in critical_rows]
+        
+    def _advance_tick(self, current_dt, rng):
+        """
+        One simulation step at `current_dt`: historical draw plus noise for every station, random
+        traffic surges, then the auto-healing sweep. All randomness comes from `rng` (a numpy Generator).
+        Returns the number of surged and healed stations.
+        """
+        surged = self._simulate_step(current_dt, rng)
+        
+        # 4. Systematic Auto-Healing Sweep 
+        # Every critical station is surged and rerouted in the same tick, with the nearby spare capacity shared between them
+        healed = self._heal_critical_stations()
+                
+        return {"surges": surged, "heals": healed}
+        
+    def _heal_critical_stations(self):
+        """
+        Batched self-healing for the whole fleet in one pass: every station over the pain threshold
+        (utilization > 60%, not surged yet) gets surge pricing, and the traffic that sheds is spread
+        over its nearest healthy stations without pushing any of them past their spare capacity.
+        Stations with the most revenue at risk are served first. Returns how many stations were healed.
+        """
+        live = self.live
+        utilization = live.array('utilization_rate')
+        price = live.array('current_price')
+        stressed = np.flatnonzero(self._critical_mask())
+        if len(stressed) == 0:
+            return 0
+        stressed = stressed[np.argsort(-live.array('revenue_at_risk_daily')[stressed], kind='stable')]
+        
+        # 1. Surge pricing on every stressed station, which drastically cuts its traffic
+        old_price = price[stressed].copy()
+        old_util = utilization[stressed].astype(np.float64)
+        new_util = np.maximum(0.20, old_util - 0.40)
+        live.update('current_price', stressed, old_price * 1.75)
+        live.update('utilization_rate', stressed, new_util)
+        live.update('estimated_wait_time_mins', stressed, 2.0)
+        remaining = old_util - new_util
+        
+        # 2. Nearest healthy neighbors of every stressed station in one spatial query
+        healthy_mask = utilization < 0.6
+        healthy_mask[stressed] = False
+        neighbors, _ = self.spatial_index.nearest_many(
+            live.array('latitude')[stressed], live.array('longitude')[stressed],
+            allowed=healthy_mask, k=REROUTE_NEIGHBORS
+        )
+        
+        # 3. Hand out spare capacity one neighbor rank at a time: every stressed station asks its
+        # next-nearest neighbor for what it still has to shed, and each neighbor serves its requests
+        # in priority order until its capacity runs out
+        capacity = np.clip(np.minimum(REROUTE_MAX_BUMP, REROUTE_MAX_UTILIZATION - utilization.astype(np.float64)), 0.0, None)
+        received = np.zeros(len(live))
+        main_neighbor = np.full(len(stressed), -1)
+        main_share = np.zeros(len(stressed))
+        for rank in range(neighbors.shape[1]):
+            asking = np.flatnonzero((neighbors[:, rank] >= 0) & (remaining > 1e-9))
+            if len(asking) == 0:
+                break
+            targets = neighbors[asking, rank]
+            order = np.lexsort((asking, targets))
+            asking, targets = asking[order], targets[order]
+            requests = remaining[asking]
+            
+            # Demand queued ahead of each request at the same neighbor
+            cumulative = np.cumsum(requests)
+            group_start = np.r_[True, targets[1:] != targets[:-1]]
+            queued_before = cumulative - requests - np.maximum.accumulate(np.where(group_start, cumulative - requests, 0.0))
+            granted = np.clip(capacity[targets] - queued_before, 0.0, requests)
+            
+            capacity -= np.bincount(targets, weights=granted, minlength=len(live))
+            received += np.bincount(targets, weights=granted, minlength=len(live))
+            remaining[asking] -= granted
+            bigger = granted > main_share[asking]
+            main_neighbor[asking[bigger]] = targets[bigger]
+            main_share[asking[bigger]] = granted[bigger]
+            
+        # 4. Discount every neighbor that took traffic (once per tick, never below the price floor, so
+        # neighbors rerouted to tick after tick don't drift towards free) and raise its utilization accordingly
+        rerouted = np.flatnonzero(received > 0)
+        old_neighbor_price = price[rerouted].copy()
+        live.update('current_price', rerouted, _discounted_price(old_neighbor_price.astype(np.float64)))
+        live.update('utilization_rate', rerouted, utilization[rerouted] + received[rerouted])
+        self._mark_live_changed()
+        
+        neighbor_price = dict(zip(rerouted.tolist(), old_neighbor_price.tolist()))
+        new_neighbor_price = dict(zip(rerouted.tolist(), price[rerouted].tolist()))
+        for i, idx in enumerate(stressed):
+            surge_text = f"${old_price[i]:.2f} ➔ ${old_price[i] * 1.75:.2f}"
+            if main_neighbor[i] >= 0:
+                neighbor = int(main_neighbor[i])
+                self.log_event("AUTO_SURGE_PRICING", {
+                    "stressed_station": live.get_str('station_name', idx),
+                    "stressed_price_increase": surge_text,
+                    "rerouted_station": live.get_str('station_name', main_neighbor[i]),
+                    "rerouted_price_decrease": f"${neighbor_price[neighbor]:.2f} ➔ ${new_neighbor_price[neighbor]:.2f}"
+                })
+            else:
+                self.log_event("AUTO_SURGE_PRICING_NO_REROUTE", {
+                    "stressed_station": live.get_str('station_name', idx),
+                    "stressed_price_increase": surge_text,
+                    "rerouted_station": "None",
+                    "rerouted_price_decrease": "N/A"
+                })
+        return len(stressed)
+            
+    def simulate_live_tick(self, timestamp_str, return_stations=True):
+        """
+        Advances the simulation by simulating live data based on historical averages 
+        at the same time last year, then applies a small chance of randomness for surges.
+        """
+        if self.active_stations is None:
+            self.load_data()
+            
+        try:
+            current_dt = pd.to_datetime(timestamp_str)
+        except Exception:
+            current_dt = pd.Timestamp.now()
             
-        # Return updated JSON
-        return self.get_all_stations()
+        self._advance_tick(current_dt, self._sim_rng)
+            
+        # Return updated JSON (callers that read the state themselves can skip building it)
+        return self.get_all_stations() if return_stations else None
+        
+    def fast_forward(self, steps, start_timestamp=None, step_minutes=60, seed=None, commit=False,
+                     score_fn=None, score_every=0):
+        """
+        Runs `steps` simulation ticks in-process, `step_minutes` of simulated time apart, and returns
+        compact per-step series plus scenario KPIs (surges, heals, revenue at risk).
+        - seed: fixes the random generator so a scenario can be replayed exactly
+        - commit: if False the run works on a scratch copy and the live state is left untouched
+        - score_fn / score_every: optionally call score_fn(stations) every N steps (and on the last
+          step) to track model output; nothing is re-scored in between
+        """
+        if self.active_stations is None:
+            self.load_data()
+            
+        try:
+            current_dt = pd.to_datetime(start_timestamp) if start_timestamp else pd.Timestamp.now()
+        except Exception:
+            current_dt = pd.Timestamp.now()
+        step = pd.Timedelta(minutes=step_minutes)
+        rng = np.random.default_rng(seed) if seed is not None else self._sim_rng
+        
+        if commit:
+            sim = self
+        else:
+            # Shallow copy shares the read-only history and indexes, only the mutable state is duplicated
+            sim = copy.copy(self)
+            sim.live = self.live.copy()
+            sim.logs = list(self.logs)
+            # A budget of 0 keeps only the latest frame, and dry runs don't notify the real state's listeners
+            sim._snapshot_cache = SnapshotCache(max_bytes=0)
+            sim.live_change_callbacks = []
+            
+        series = {
+            "timestamp": [], "surges": [], "heals": [], "mean_utilization": [],
+            "max_temperature_f": [], "critical_stations": [], "revenue_at_risk": []
+        }
+        scores = []
+        for i in range(steps):
+            stats = sim._advance_tick(current_dt, rng)
+            stations = sim.active_stations
+            
+            series["timestamp"].append(current_dt.isoformat())
+            series["surges"].append(stats["surges"])
+            series["heals"].append(stats["heals"])
+            series["mean_utilization"].append(round(float(stations['utilization_rate'].mean()), 4))
+            series["max_temperature_f"].append(round(float(stations['temperature_f'].max()), 2))
+            series["critical_stations"].append(int((stations['utilization_rate'] > 0.60).sum()))
+            series["revenue_at_risk"].append(round(float(stations['revenue_at_risk_daily'].sum()), 2))
+            
+            if score_fn is not None and score_every > 0 and ((i + 1) % score_every == 0 or i == steps - 1):
+                scores.append(dict(step=i, timestamp=current_dt.isoformat(), **score_fn(stations)))
+                
+            current_dt += step
+            
+        summary = {
+            "steps": steps,
+            "committed": commit,
+            "seed": seed,
+            "total_surges": int(sum(series["surges"])),
+            "total_heals": int(sum(series["heals"])),
+            "steps_with_heals": int(sum(1 for heals in series["heals"] if heals)),
+            "peak_critical_stations": max(series["critical_stations"], default=0),
+            "peak_revenue_at_risk": max(series["revenue_at_risk"], default=0.0),
+            "final_revenue_at_risk": series["revenue_at_risk"][-1] if steps else 0.0,
+            "mean_revenue_at_risk": round(float(np.mean(series["revenue_at_risk"])), 2) if steps else 0.0
+        }
+        result = {"summary": summary, "series": series}
+        if scores:
+            result["scores"] = scores
+        return result
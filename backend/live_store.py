@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+class LiveStationStore:
+    """
+    The live fleet as a struct of arrays: one NumPy array per column, with string columns
+    dictionary-encoded (integer codes plus a categories array). Single-cell and bulk writes are
+    plain array assignments instead of DataFrame.at calls, and to_frame() hands the existing
+    pandas read paths a DataFrame built over the same arrays without copying them.
+    Rows are addressed by position (the live table always has a RangeIndex).
+    """
+    def __init__(self, frame):
+        frame = frame.reset_index(drop=True)
+        self._arrays = {}
+        self._categories = {}
+        self._lookup = {}
+        for col in frame.columns:
+            series = frame[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                self._set_dictionary(col, series.cat.codes.to_numpy(), series.cat.categories.to_numpy(dtype=object))
+            elif series.dtype == object:
+                codes, categories = pd.factorize(series, use_na_sentinel=True)
+                self._set_dictionary(col, codes, np.asarray(categories, dtype=object))
+            elif isinstance(series.dtype, np.dtype):
+                self._arrays[col] = series.to_numpy(copy=True)
+            else:
+                # Nullable extension columns (Int64, boolean) keep their pandas array
+                self._arrays[col] = series.array.copy()
+        self.columns = list(frame.columns)
+        self._view = None
+
+    def _set_dictionary(self, col, codes, categories):
+        self._categories[col] = categories
+        self._lookup[col] = {value: code for code, value in enumerate(categories)}
+        # Widen to int32 so new categories can always be appended in place
+        self._arrays[col] = codes.astype(np.int32)
+
+    def __len__(self):
+        return len(next(iter(self._arrays.values()))) if self._arrays else 0
+
+    def copy(self):
+        other = object.__new__(LiveStationStore)
+        other._arrays = {col: array.copy() for col, array in self._arrays.items()}
+        other._categories = dict(self._categories)
+        other._lookup = {col: dict(lookup) for col, lookup in self._lookup.items()}
+        other.columns = list(self.columns)
+        other._view = None
+        return other
+
+    # --- Typed accessors ---
+
+    def get(self, col, row):
+        """One cell as a plain Python value (strings decoded, missing strings as None)."""
+        value = self._arrays[col][row]
+        if col in self._categories:
+            return self._categories[col][value] if value >= 0 else None
+        return value.item() if hasattr(value, 'item') else value
+
+    def get_float(self, col, row):
+        return float(self._arrays[col][row])
+
+    def get_str(self, col, row):
+        value = self.get(col, row)
+        return None if value is None else str(value)
+
+    def array(self, col):
+        """The stored array itself (codes for string columns); writes to it are writes to the store."""
+        return self._arrays[col]
+
+    def values(self, col):
+        """Decoded column values (strings as an object array)."""
+        if col in self._categories:
+            codes = self._arrays[col]
+            return np.where(codes >= 0, self._categories[col][np.maximum(codes, 0)], None)
+        return self._arrays[col]
+
+    # --- Writes ---
+
+    def _encode(self, col, values):
+        lookup = self._lookup[col]
+        new = [value for value in dict.fromkeys(values) if value is not None and value not in lookup and not pd.isna(value)]
+        if new:
+            start = len(self._categories[col])
+            self._categories[col] = np.concatenate([self._categories[col], np.asarray(new, dtype=object)])
+            lookup.update({value: start + i for i, value in enumerate(new)})
+        return np.array([lookup.get(value, -1) if value is not None else -1 for value in values], dtype=np.int32)
+
+    def set(self, col, row, value):
+        """Writes one cell in place."""
+        if col in self._categories:
+            self._arrays[col][row] = self._encode(col, [value])[0]
+            self._view = None
+        else:
+            self._arrays[col][row] = value
+
+    def update(self, col, rows, values):
+        """Writes many cells of one column in place (rows: positions or a boolean mask)."""
+        if col in self._categories:
+            values = self._encode(col, list(np.broadcast_to(np.asarray(values, dtype=object), np.shape(self._arrays[col][rows]))))
+            # from_codes may have copied the codes, rebuild the view on next read
+            self._view = None
+        self._arrays[col][rows] = values
+
+    def assign(self, col, values):
+        """Replaces a whole column's values in place (cast to the column's dtype), or adds a new column."""
+        if col not in self._arrays:
+            self._arrays[col] = np.array(values, copy=True)
+            self.columns.append(col)
+            self._view = None
+        elif col in self._categories:
+            self.update(col, slice(None), values)
+        else:
+            self._arrays[col][:] = values
+
+    # --- DataFrame view ---
+
+    def to_frame(self):
+        """
+        A DataFrame over the store's arrays (numeric columns are not copied, so it always shows the
+        current values; it is rebuilt after string writes). String columns come back as categoricals.
+        Treat it as read-only: write through the store instead.
+        """
+        if self._view is None:
+            data = {}
+            for col in self.columns:
+                if col in self._categories:
+                    data[col] = pd.Categorical.from_codes(self._arrays[col], categories=pd.Index(self._categories[col]))
+                else:
+                    data[col] = self._arrays[col]
+            self._view = pd.DataFrame(data, copy=False)
+        return self._view
@@ -0,0 +1,65 @@
+import threading
+import numpy as np
+
+class PredictionCache:
+    """
+    Per-station model outputs, stored next to the exact feature row they were computed from.
+    A request only re-scores stations whose feature row changed since they were last scored (or
+    that were never scored); everything else is served from the cache. Entries belong to one
+    model version: the first request after a model reload starts from an empty cache.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self, model_version=None):
+        self.model_version = model_version
+        self._slots = {}
+        self._features = None
+        self._predicted = np.empty(0, dtype=object)
+        self._risk = np.empty(0, dtype=np.float64)
+        self._cluster = np.empty(0, dtype=np.int64)
+
+    def _grow(self, num_features, size):
+        if self._features is None or self._features.shape[1] != num_features:
+            self._features = np.empty((0, num_features), dtype=np.float32)
+        capacity = len(self._features)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 64)
+        pad = capacity - len(self._features)
+        self._features = np.vstack([self._features, np.full((pad, num_features), np.nan, dtype=np.float32)])
+        self._predicted = np.concatenate([self._predicted, np.full(pad, None, dtype=object)])
+        self._risk = np.concatenate([self._risk, np.zeros(pad)])
+        self._cluster = np.concatenate([self._cluster, np.full(pad, -1, dtype=np.int64)])
+
+    def predict(self, station_ids, X, model_version, score_fn):
+        """
+        Model outputs for every row of the feature matrix X (one row per station id).
+        `score_fn(X_dirty)` scores the rows that need it and returns (predicted, risk, cluster),
+        cluster being -1 where no root-cause cluster is available.
+        Returns (predicted, risk, cluster) for all rows, in X's order.
+        """
+        with self._lock:
+            if model_version != self.model_version or (self._features is not None and self._features.shape[1] != X.shape[1]):
+                self.clear(model_version)
+
+            # New stations get a slot, then rows are dirty if the cached features differ
+            new_ids = [station_id for station_id in dict.fromkeys(station_ids) if station_id not in self._slots]
+            start = len(self._slots)
+            self._slots.update((station_id, start + i) for i, station_id in enumerate(new_ids))
+            self._grow(X.shape[1], len(self._slots))
+            slots = np.fromiter((self._slots[station_id] for station_id in station_ids), dtype=np.int64, count=len(station_ids))
+
+            # NaN-initialized slots never compare equal, so unseen stations are always dirty
+            dirty = np.flatnonzero((self._features[slots] != X).any(axis=1))
+            out_predicted, out_risk, out_cluster = self._predicted[slots], self._risk[slots], self._cluster[slots]
+            if len(dirty):
+                predicted, risk, cluster = score_fn(X[dirty])
+                # Fresh scores go to the output rows directly, so repeated ids still get their own row's result
+                out_predicted[dirty], out_risk[dirty], out_cluster[dirty] = predicted, risk, cluster
+                self._features[slots[dirty]] = X[dirty]
+                self._predicted[slots[dirty]] = predicted
+                self._risk[slots[dirty]] = risk
+                self._cluster[slots[dirty]] = cluster
+            return out_predicted, out_risk, out_cluster
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+# One slot per (month, hour of day)
+SLOTS_PER_STATION = 12 * 24
+
+class StationSlotPools:
+    """
+    Historical readings grouped by (station, month, hour): every pool is a contiguous slice of
+    one array per column, located through a dense offsets table. Built once per load, so the
+    simulator's "same station, same month and hour" draw is a table lookup plus a random pick
+    instead of re-deriving datetime parts for the whole raw table on every tick.
+    """
+    def __init__(self, raw_data, columns=('utilization_rate', 'temperature_f')):
+        station_codes, self.station_ids = pd.factorize(raw_data['station_id'])
+        timestamps = raw_data['timestamp']
+        valid = timestamps.notna().to_numpy()
+        slots = ((timestamps.dt.month.fillna(1).to_numpy(dtype=np.int64) - 1) * 24 +
+                 timestamps.dt.hour.fillna(0).to_numpy(dtype=np.int64))
+
+        # Rows without a timestamp can't belong to any slot
+        keys = (station_codes.astype(np.int64) * SLOTS_PER_STATION + slots)[valid]
+        order = np.argsort(keys, kind='stable')
+
+        self.samples = {
+            col: raw_data[col].to_numpy(dtype=np.float32)[valid][order]
+            for col in columns
+        }
+        counts = np.bincount(keys, minlength=len(self.station_ids) * SLOTS_PER_STATION)
+        offset_dtype = np.int32 if len(order) < np.iinfo(np.int32).max else np.int64
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(offset_dtype)
+
+    def station_codes(self, station_ids):
+        """Maps station ids to pool codes (-1 for stations without any history)."""
+        return self.station_ids.get_indexer(station_ids)
+
+    def draw(self, codes, month, hour, rng=None):
+        """
+        Picks one random reading per station from its (month, hour) pool.
+        Returns ({column: float64 array}, has_sample); stations with an empty pool get NaN.
+        """
+        rng = np.random if rng is None else rng
+        codes = np.asarray(codes, dtype=np.int64)
+        known = codes >= 0
+
+        keys = np.where(known, codes, 0) * SLOTS_PER_STATION + (month - 1) * 24 + hour
+        first = self.offsets[keys].astype(np.int64)
+        counts = np.where(known, self.offsets[keys + 1] - first, 0)
+        has_sample = counts > 0
+
+        # Uniform pick inside each pool (empty pools point at row 0 and are masked below)
+        offsets = np.minimum((rng.random(len(codes)) * counts).astype(np.int64), np.maximum(counts - 1, 0))
+        rows = np.where(has_sample, first + offsets, 0)
+
+        values = {}
+        for col, samples in self.samples.items():
+            if len(samples) == 0:
+                values[col] = np.full(len(codes), np.nan)
+            else:
+                values[col] = np.where(has_sample, samples[rows].astype(np.float64), np.nan)
+        return values, has_sample
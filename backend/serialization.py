@@ -0,0 +1,105 @@
+import json
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry_store import expand_compact_dtypes, widen_float32
+
+try:
+    import pyarrow as pa
+except ImportError:  # Only needed for the opt-in Arrow IPC wire format
+    pa = None
+
+# Wire formats accepted by the stations endpoints: array of objects (default),
+# struct of arrays, or an Apache Arrow IPC stream
+STATION_FORMATS = ('records', 'columnar', 'arrow')
+ARROW_STREAM_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+ARROW_AVAILABLE = pa is not None
+
+# Decimal places pandas' JSON encoder writes for floats (its maximum; the default of 10 truncates values)
+JSON_DOUBLE_PRECISION = 15
+
+def frame_to_records(df):
+    """
+    Original serialization path: a list of plain Python dicts (NaN -> None, numpy scalars -> native).
+    Still used where callers want to work with individual station dicts.
+    """
+    # Clean up data for JSON serialization (convert NaN to None, numpy types to native)
+    df_clean = expand_compact_dtypes(df).replace({np.nan: None})
+
+    # Convert numpy booleans and integers to python native types
+    for col in df_clean.columns:
+        if df_clean[col].dtype == 'bool' or df_clean[col].dtype.name == 'bool':
+            df_clean[col] = df_clean[col].astype(bool)
+        elif pd.api.types.is_integer_dtype(df_clean[col]):
+            df_clean[col] = df_clean[col].astype(int)
+        elif pd.api.types.is_float_dtype(df_clean[col]):
+            df_clean[col] = df_clean[col].astype(float)
+
+    return df_clean.to_dict(orient='records')
+
+def _widen_float32_columns(df):
+    float32_cols = [col for col in df.columns if df[col].dtype == 'float32']
+    if not float32_cols:
+        return df
+    return df.assign(**{col: widen_float32(df[col].to_numpy()) for col in float32_cols})
+
+def frame_to_json_bytes(df):
+    """
+    Fast path: encodes a stations DataFrame straight to a JSON array of records using pandas'
+    C encoder. No per-station dicts are built, NaN becomes null natively, categoricals and
+    numpy scalars are handled column-wise, timestamps come out as ISO 8601 strings.
+    """
+    df = _widen_float32_columns(df)
+    return df.to_json(orient='records', date_format='iso', date_unit='s', double_precision=JSON_DOUBLE_PRECISION).encode('utf-8')
+
+def compose_json_object(fields, raw_fields=None):
+    """
+    Builds a JSON object from small regular values (`fields`, encoded with json.dumps) and
+    already-encoded JSON byte strings (`raw_fields`, spliced in as-is), e.g. a stations array
+    produced by frame_to_json_bytes.
+    """
+    parts = [json.dumps(key).encode('utf-8') + b':' + json.dumps(value).encode('utf-8') for key, value in fields.items()]
+    for key, raw in (raw_fields or {}).items():
+        parts.append(json.dumps(key).encode('utf-8') + b':' + raw)
+    return b'{' + b','.join(parts) + b'}'
+
+def _series_to_json_bytes(series):
+    if series.dtype == 'float32':
+        series = pd.Series(widen_float32(series.to_numpy()), index=series.index)
+    return series.to_json(orient='values', date_format='iso', date_unit='s', double_precision=JSON_DOUBLE_PRECISION).encode('utf-8')
+
+def changes_to_json_bytes(changes):
+    """Encodes TickJournal.changes_since output as {field: {"station_ids": [...], "values": [...]}}."""
+    raw_fields = {
+        field: b'{"station_ids":' + _series_to_json_bytes(station_ids) + b',"values":' + _series_to_json_bytes(values) + b'}'
+        for field, (station_ids, values) in changes.items()
+    }
+    return compose_json_object({}, raw_fields)
+
+def frame_to_columnar_json_bytes(df):
+    """
+    Struct-of-arrays encoding: {"column": [v0, v1, ...], ...}. Each key appears once instead of once
+    per station, and clients can hand every array straight to typed arrays or a columnar store.
+    """
+    return compose_json_object({}, {col: _series_to_json_bytes(df[col]) for col in df.columns})
+
+def frame_to_arrow_ipc_bytes(df):
+    """Encodes the stations DataFrame as an Arrow IPC stream (categoricals become dictionary arrays)."""
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the Arrow wire format.")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def encode_stations(df, fmt='records'):
+    """Encodes a stations DataFrame in one of STATION_FORMATS."""
+    if fmt == 'columnar':
+        return frame_to_columnar_json_bytes(df)
+    if fmt == 'arrow':
+        return frame_to_arrow_ipc_bytes(df)
+    return frame_to_json_bytes(df)
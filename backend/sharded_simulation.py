@@ -0,0 +1,273 @@
+"""
+Multi-process live simulation for fleets too large for one process (see benchmark_simulation.py).
+The API does not use it; it always runs the single-process DataManager.
+
+Sharded mode follows the older healing policy: every tick the coordinator heals at most
+HEALS_PER_TICK critical stations, in fleet order, each with one reroute to the nearest healthy
+station in any shard. DataManager instead heals every critical station in one batched solve that
+shares out the nearby spare capacity (_heal_critical_stations), so the two modes give different
+results for the same seed. Stations are picked with the same critical-station test in both.
+"""
+import multiprocessing
+import os
+import sys
+import zlib
+import datetime
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry_store import list_station_ids, load_station_rows
+from data_manager import DataManager
+
+# Fleet-wide auto-heal budget per tick (the older policy, see the module docstring)
+HEALS_PER_TICK = 2
+
+def partition_station_ids(station_ids, num_shards, regions=None):
+    """
+    Splits stations into `num_shards` groups. Without `regions` each station goes to the shard given
+    by a stable hash of its id. With `regions` (station_id -> region label) whole regions are kept
+    together, largest first onto the least loaded shard, so most reroutes stay inside one shard.
+    """
+    shards = [[] for _ in range(num_shards)]
+    if regions is None:
+        for station_id in station_ids:
+            shards[zlib.crc32(str(station_id).encode('utf-8')) % num_shards].append(station_id)
+        return shards
+
+    by_region = {}
+    for station_id in station_ids:
+        by_region.setdefault(regions.get(station_id), []).append(station_id)
+    loads = [0] * num_shards
+    for _, members in sorted(by_region.items(), key=lambda item: -len(item[1])):
+        target = int(np.argmin(loads))
+        shards[target].extend(members)
+        loads[target] += len(members)
+    return shards
+
+def _station_regions(filepath, station_ids, region_column='state'):
+    """Maps each station to its region, reading only the sampled stations' rows through the station index."""
+    rows = load_station_rows(filepath, station_ids, columns=['station_id', 'timestamp', region_column])
+    rows = rows.drop_duplicates('station_id', keep='last')
+    regions = dict(zip(rows['station_id'], rows[region_column]))
+    return {station_id: regions.get(station_id) for station_id in station_ids}
+
+class _ShardState:
+    """Live state of one shard, owned by a worker process. Every command is a method returning picklable data."""
+    def __init__(self, filepath, station_ids, seed):
+        self.db = DataManager(filepath, station_ids=station_ids)
+        self.db.load_data()
+        self.rng = np.random.default_rng(seed)
+
+    def _idx(self, station_id):
+        return self.db._station_idx(station_id)
+
+    def step(self, timestamp):
+        # Surge events are logged by the shard, hand them over to the coordinator's log
+        self.db.logs = []
+        surged = self.db._simulate_step(pd.Timestamp(timestamp), self.rng)
+        return {"surges": surged, "critical": self.db._critical_station_ids(limit=HEALS_PER_TICK), "logs": self.db.logs}
+
+    def surge(self, station_id):
+        idx = self._idx(station_id)
+        live = self.db.live
+        old_price, new_price = self.db._surge_price(idx)
+        return {
+            "latitude": live.get_float('latitude', idx),
+            "longitude": live.get_float('longitude', idx),
+            "station_name": live.get_str('station_name', idx),
+            "old_price": float(old_price),
+            "new_price": float(new_price)
+        }
+
+    def nearest_healthy(self, lat, lon, exclude_station_id=None):
+        exclude_idx = self._idx(exclude_station_id) if exclude_station_id is not None else None
+        idx, dist = self.db._nearest_healthy(lat, lon, exclude_idx=exclude_idx)
+        if idx is None:
+            return None
+        return dist, self.db.live.get_str('station_id', idx)
+
+    def reroute(self, station_id):
+        idx = self._idx(station_id)
+        old_price, new_price = self.db._reroute_discount(idx)
+        return {
+            "station_name": self.db.live.get_str('station_name', idx),
+            "old_price": float(old_price),
+            "new_price": float(new_price)
+        }
+
+    def frame(self):
+        return self.db.active_stations
+
+    def station_count(self):
+        return len(self.db.live)
+
+def _shard_worker_main(conn, filepath, station_ids, seed):
+    """Worker process loop: build the shard, then answer (command, args) messages until 'stop'."""
+    try:
+        shard = _ShardState(filepath, station_ids, seed)
+        conn.send(('ok', len(shard.db.active_stations)))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+
+    while True:
+        command, args = conn.recv()
+        if command == 'stop':
+            break
+        try:
+            conn.send(('ok', getattr(shard, command)(*args)))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+class ShardedSimulation:
+    """
+    Runs the live simulation for a large fleet across a pool of worker processes. Each worker owns
+    one shard's live state and (station, month, hour) pools and ticks it in parallel with the others;
+    this coordinator merges the results and runs the auto-heal sweep, so a stressed station can be
+    rerouted to the nearest healthy station in any shard. Unlike DataManager, the sweep heals at most
+    HEALS_PER_TICK stations per tick.
+    """
+    def __init__(self, filepath, num_stations=100, num_shards=None, shard_by='station_id', seed=None):
+        self.filepath = filepath
+        self.num_stations = num_stations
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.shard_by = shard_by
+        self.seed = seed
+        self.logs = []
+        self.live_version = 0
+        self._workers = []
+        self._owner = {}
+
+    def log_event(self, action, details):
+        """Same log format and retention as DataManager.log_event."""
+        self.logs.append({
+            "timestamp": datetime.datetime.now().isoformat(),
+            "action": action,
+            "details": details
+        })
+        if len(self.logs) > 50:
+            self.logs.pop(0)
+
+    def start(self):
+        """Samples the fleet, partitions it and starts one worker per non-empty shard."""
+        unique_stations = list_station_ids(self.filepath)
+        sample_size = min(self.num_stations, len(unique_stations))
+        rng = np.random.default_rng(self.seed)
+        station_ids = list(rng.choice(unique_stations, sample_size, replace=False))
+
+        if self.shard_by == 'station_id':
+            regions = None
+        else:
+            regions = _station_regions(self.filepath, station_ids, region_column=self.shard_by)
+        shards = [shard for shard in partition_station_ids(station_ids, self.num_shards, regions) if shard]
+
+        # Spawn, not fork: the parent may be a threaded web server
+        context = multiprocessing.get_context('spawn')
+        seeds = np.random.SeedSequence(self.seed).spawn(len(shards))
+        for shard_ids, shard_seed in zip(shards, seeds):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker_main,
+                args=(child_conn, self.filepath, shard_ids, shard_seed),
+                daemon=True
+            )
+            process.start()
+            self._workers.append((process, parent_conn))
+            for station_id in shard_ids:
+                self._owner[station_id] = len(self._workers) - 1
+
+        # Workers load their shards concurrently
+        for _, conn in self._workers:
+            self._receive(conn)
+        print(f"Sharded simulation ready: {len(station_ids)} stations across {len(self._workers)} workers.")
+        return self
+
+    def close(self):
+        for process, conn in self._workers:
+            try:
+                conn.send(('stop', ()))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+        self._workers = []
+        self._owner = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _receive(conn):
+        status, value = conn.recv()
+        if status == 'error':
+            raise RuntimeError(f"Simulation shard failed: {value}")
+        return value
+
+    def _call(self, worker, command, *args):
+        conn = self._workers[worker][1]
+        conn.send((command, args))
+        return self._receive(conn)
+
+    def _broadcast(self, command, *args):
+        """Sends a command to every worker first, then collects the replies, so workers run it in parallel."""
+        for _, conn in self._workers:
+            conn.send((command, args))
+        return [self._receive(conn) for _, conn in self._workers]
+
+    def simulate_live_tick(self, timestamp_str):
+        """One fleet-wide tick: parallel per-shard step, then the cross-shard auto-heal sweep. Returns tick stats."""
+        try:
+            current_dt = pd.to_datetime(timestamp_str)
+        except Exception:
+            current_dt = pd.Timestamp.now()
+
+        results = self._broadcast('step', current_dt.isoformat())
+        for result in results:
+            self.logs.extend(result["logs"])
+        del self.logs[:-50]
+
+        # Fleet order is shard order, so "first two critical stations" is taken across shards in turn
+        critical = [station_id for result in results for station_id in result["critical"]][:HEALS_PER_TICK]
+        healed = sum(1 for station_id in critical if self.apply_self_healing_pricing(station_id) is not None)
+
+        self.live_version += 1
+        return {"surges": sum(result["surges"] for result in results), "heals": healed}
+
+    def apply_self_healing_pricing(self, station_id):
+        """Cross-shard version of DataManager.apply_self_healing_pricing: surge locally, reroute to the nearest healthy station anywhere."""
+        owner = self._owner.get(station_id)
+        if owner is None:
+            return None
+
+        stressed = self._call(owner, 'surge', station_id)
+        candidates = [
+            (found[0], worker, found[1])
+            for worker, found in enumerate(self._broadcast('nearest_healthy', stressed["latitude"], stressed["longitude"], station_id))
+            if found is not None
+        ]
+
+        if candidates:
+            _, worker, rerouted_id = min(candidates, key=lambda candidate: candidate[0])
+            rerouted = self._call(worker, 'reroute', rerouted_id)
+            self.log_event("AUTO_SURGE_PRICING", {
+                "stressed_station": stressed["station_name"],
+                "stressed_price_increase": f"${stressed['old_price']:.2f} ➔ ${stressed['new_price']:.2f}",
+                "rerouted_station": rerouted["station_name"],
+                "rerouted_price_decrease": f"${rerouted['old_price']:.2f} ➔ ${rerouted['new_price']:.2f}"
+            })
+            return {"stressed_station": station_id, "rerouted_station": rerouted_id}
+
+        self.log_event("AUTO_SURGE_PRICING_NO_REROUTE", {
+            "stressed_station": stressed["station_name"],
+            "stressed_price_increase": f"${stressed['old_price']:.2f} ➔ ${stressed['new_price']:.2f}",
+            "rerouted_station": "None",
+            "rerouted_price_decrease": "N/A"
+        })
+        return {"stressed_station": station_id, "rerouted_station": None}
+
+    def get_live_frame(self):
+        """The whole fleet's live state as one DataFrame (shards concatenated in shard order)."""
+        return pd.concat(self._broadcast('frame'), ignore_index=True)
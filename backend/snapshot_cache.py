@@ -0,0 +1,76 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+def _sizeof(value):
+    """Approximate memory footprint of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+class SnapshotCache:
+    """
+    Small thread-safe LRU cache for computed station snapshots, bounded by the bytes it holds.
+    Keys carry the data/model versions they were computed from, so a mutation only has to bump
+    a version number; the owner discard()s the superseded entries so they don't sit in the budget.
+    """
+    def __init__(self, max_bytes=64 * 1024 ** 2):
+        # The most recent entry is always kept, even when it alone exceeds the budget
+        self.max_bytes = max_bytes
+        self._nbytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        # One lock per key being computed: N identical concurrent requests cost one computation,
+        # while requests for other keys are neither blocked by it nor block it
+        self._key_locks = {}
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                # Computed by another request while this one waited
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+
+            value = compute()
+            size = _sizeof(value)
+            with self._lock:
+                self._key_locks.pop(key, None)
+                self._entries[key] = value
+                self._sizes[key] = size
+                self._nbytes += size
+                while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                    self._pop(next(iter(self._entries)))
+            return value
+
+    def _pop(self, key):
+        del self._entries[key]
+        self._nbytes -= self._sizes.pop(key)
+
+    def discard(self, predicate):
+        """Drops every entry whose key matches the predicate."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+# Mean Earth radius, turns haversine distances (radians) into kilometers
+EARTH_RADIUS_KM = 6371.0088
+
+class StationSpatialIndex:
+    """
+    Great-circle nearest-neighbor index over station coordinates (a haversine BallTree).
+    Stations don't move while the simulation runs, so it is built once per load; which stations
+    qualify (e.g. "healthy") is passed per query as a boolean mask over live-store positions.
+    """
+    def __init__(self, latitudes, longitudes):
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.size = len(latitudes)
+
+        # Stations without coordinates can't be located, they are never returned
+        valid = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        self.rows = np.flatnonzero(valid)
+        self.tree = BallTree(np.radians(np.column_stack([latitudes[valid], longitudes[valid]])), metric='haversine') if valid.any() else None
+
+    def nearest(self, lat, lon, allowed=None, k=1):
+        """
+        The k stations nearest to (lat, lon) among those where `allowed` is True.
+        Returns (rows, distances_km), closest first; fewer than k if not enough stations qualify.
+        """
+        rows, dist_km = self.nearest_many([lat], [lon], allowed=allowed, k=k)
+        found = rows[0] >= 0
+        return rows[0][found], dist_km[0][found]
+
+    def nearest_many(self, lats, lons, allowed=None, k=1):
+        """
+        Batched nearest(): the k allowed stations closest to each point, as (rows, distances_km)
+        matrices of shape [points x k], closest first, padded with -1 / inf. Every point starts from a
+        small neighborhood, which is widened only for points where too few neighbors qualify.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        out_rows = np.full((len(lats), k), -1, dtype=np.int64)
+        out_dist = np.full((len(lats), k), np.inf)
+        if self.tree is None or len(lats) == 0:
+            return out_rows, out_dist
+
+        total = len(self.rows)
+        pending = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        query_k = min(max(8, 4 * k), total)
+        while len(pending):
+            dist, ind = self.tree.query(np.radians(np.column_stack([lats[pending], lons[pending]])), k=query_k)
+            rows = self.rows[ind]
+            keep = np.ones(rows.shape, dtype=bool) if allowed is None else allowed[rows]
+
+            # Rank of every qualifying neighbor among its point's qualifying neighbors
+            rank = np.cumsum(keep, axis=1) - 1
+            point_idx, neighbor_idx = np.nonzero(keep & (rank < k))
+            out_rows[pending[point_idx], rank[point_idx, neighbor_idx]] = rows[point_idx, neighbor_idx]
+            out_dist[pending[point_idx], rank[point_idx, neighbor_idx]] = dist[point_idx, neighbor_idx] * EARTH_RADIUS_KM
+
+            if query_k == total:
+                break
+            pending = pending[keep.sum(axis=1) < k]
+            query_k = min(query_k * 4, total)
+        return out_rows, out_dist
+
+# Base cell size of the viewport grid index, in degrees
+GRID_CELL_DEG = 0.5
+# Map clustering: a cluster spans about this many pixels of a 256px web map tile
+CLUSTER_CELL_PIXELS = 60
+# From this zoom level on, viewport queries return individual stations only
+CLUSTER_MAX_ZOOM = 12
+
+class StationGridIndex:
+    """
+    Uniform lat/lon grid over a stations frame for viewport queries: stations are sorted by grid
+    cell, so a bounding box only touches the cells it overlaps (one binary search per cell row)
+    instead of testing every station.
+    """
+    def __init__(self, latitudes, longitudes, cell_deg=GRID_CELL_DEG):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self.num_cols = int(np.ceil(360.0 / cell_deg))
+
+        valid = np.flatnonzero(~(np.isnan(self.latitudes) | np.isnan(self.longitudes)))
+        keys = self._cell_keys(self.latitudes[valid], self.longitudes[valid])
+        order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[order]
+        self.rows = valid[order]
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.latitudes, self.longitudes, self.sorted_keys, self.rows))
+
+    def _cell_keys(self, lats, lons):
+        cell_y = np.floor((lats + 90.0) / self.cell_deg).astype(np.int64)
+        cell_x = np.clip(np.floor((lons + 180.0) / self.cell_deg).astype(np.int64), 0, self.num_cols - 1)
+        return cell_y * self.num_cols + cell_x
+
+    def query_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Rows inside the box, in frame order. A box with min_lon > max_lon wraps across the antimeridian."""
+        if min_lon > max_lon:
+            return np.union1d(self.query_bbox(min_lat, min_lon, max_lat, 180.0), self.query_bbox(min_lat, -180.0, max_lat, max_lon))
+
+        y0, y1 = (np.floor((np.clip([min_lat, max_lat], -90.0, 90.0) + 90.0) / self.cell_deg)).astype(np.int64)
+        x0, x1 = np.clip(np.floor((np.array([min_lon, max_lon]) + 180.0) / self.cell_deg).astype(np.int64), 0, self.num_cols - 1)
+        cell_rows = np.arange(y0, y1 + 1)
+        starts = np.searchsorted(self.sorted_keys, cell_rows * self.num_cols + x0, side='left')
+        ends = np.searchsorted(self.sorted_keys, cell_rows * self.num_cols + x1, side='right')
+        if not (ends > starts).any():
+            return np.empty(0, dtype=np.int64)
+
+        candidates = self.rows[np.concatenate([np.arange(start, end) for start, end in zip(starts, ends) if end > start])]
+        lats = self.latitudes[candidates]
+        lons = self.longitudes[candidates]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return np.sort(candidates[inside])
+
+def cluster_by_grid(stations, zoom):
+    """
+    Server-side map clustering: groups stations into grid cells sized for the zoom level
+    (about CLUSTER_CELL_PIXELS on screen). Returns (clusters, single_rows): a DataFrame with one row
+    per cell holding 2+ stations (centroid, count, max risk, summed revenue at risk, stations needing
+    maintenance), and the positions of stations alone in their cell, to be sent as plain stations.
+    """
+    lats = stations['latitude'].to_numpy(dtype=np.float64)
+    lons = stations['longitude'].to_numpy(dtype=np.float64)
+    located = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+
+    cell_deg = 360.0 / (2 ** zoom) * CLUSTER_CELL_PIXELS / 256.0
+    cell_y = np.floor((lats[located] + 90.0) / cell_deg).astype(np.int64)
+    cell_x = np.floor((lons[located] + 180.0) / cell_deg).astype(np.int64)
+    _, cell, counts = np.unique(cell_y * (int(np.ceil(360.0 / cell_deg)) + 1) + cell_x, return_inverse=True, return_counts=True)
+
+    in_cluster = counts[cell] > 1
+    single_rows = located[~in_cluster]
+    rows = located[in_cluster]
+    cell = cell[in_cluster]
+    if len(rows) == 0:
+        return pd.DataFrame(columns=['latitude', 'longitude', 'count', 'max_risk_score', 'revenue_at_risk', 'needs_maintenance']), single_rows
+
+    # Renumber the multi-station cells 0..n-1
+    cluster_ids, cluster = np.unique(cell, return_inverse=True)
+    num_clusters = len(cluster_ids)
+    count = np.bincount(cluster, minlength=num_clusters)
+
+    def column(name, default=0.0):
+        if name not in stations.columns:
+            return np.full(len(rows), default)
+        return np.nan_to_num(stations[name].to_numpy(dtype=np.float64, na_value=np.nan)[rows], nan=default)
+
+    max_risk = np.full(num_clusters, -np.inf)
+    np.maximum.at(max_risk, cluster, column('risk_score', -np.inf))
+    clusters = pd.DataFrame({
+        'latitude': np.bincount(cluster, weights=lats[rows], minlength=num_clusters) / count,
+        'longitude': np.bincount(cluster, weights=lons[rows], minlength=num_clusters) / count,
+        'count': count,
+        'max_risk_score': np.where(np.isfinite(max_risk), max_risk, np.nan),
+        'revenue_at_risk': np.bincount(cluster, weights=column('revenue_at_risk_daily'), minlength=num_clusters),
+        'needs_maintenance': np.bincount(cluster, weights=column('needs_maintenance'), minlength=num_clusters).astype(np.int64)
+    })
+    return clusters, single_rows
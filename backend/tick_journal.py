@@ -0,0 +1,89 @@
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# The only station fields a simulation tick (plus re-scoring) ever changes
+DELTA_FIELDS = [
+    'utilization_rate', 'temperature_f', 'estimated_wait_time_mins', 'current_price',
+    'revenue_at_risk_daily', 'predicted_status', 'risk_score', 'needs_maintenance',
+    'root_cause_diagnosis'
+]
+
+class TickJournal:
+    """
+    Remembers which (station, field) cells changed at each tick version, so a client holding
+    version N can be sent just the cells that changed since N instead of the whole fleet.
+    Values are always taken from the current state; the journal only stores change masks.
+    """
+    def __init__(self, max_lag=30):
+        self.max_lag = max_lag
+        self.version = 0
+        self.station_ids = None
+        self.fields = []
+        self._last_values = {}
+        # (version, bool mask [stations x fields]) for the most recent ticks
+        self._history = deque(maxlen=max_lag)
+        # Clients older than this (fleet reloaded, or too far behind) need a full resync
+        self._oldest_delta_base = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _same(old, new):
+        if old.dtype.kind == 'f' and new.dtype.kind == 'f':
+            return (old == new) | (np.isnan(old) & np.isnan(new))
+        return (old == new) | (pd.isna(old) & pd.isna(new))
+
+    def record(self, stations):
+        """Stores the post-tick state of the fleet and returns its new version number."""
+        with self._lock:
+            self.version += 1
+            station_ids = stations['station_id'].to_numpy(dtype=object)
+            fields = [field for field in DELTA_FIELDS if field in stations.columns]
+            values = {field: stations[field].to_numpy() for field in fields}
+
+            fleet_changed = (
+                self.station_ids is None or
+                fields != self.fields or
+                len(station_ids) != len(self.station_ids) or
+                not (station_ids == self.station_ids).all()
+            )
+            if fleet_changed:
+                # Different stations (or columns) than before, nothing older can be expressed as a delta
+                self._history.clear()
+                self._oldest_delta_base = self.version
+            else:
+                mask = np.column_stack([
+                    ~self._same(self._last_values[field], values[field]) for field in fields
+                ]) if fields else np.zeros((len(station_ids), 0), dtype=bool)
+                self._history.append((self.version, mask))
+                self._oldest_delta_base = max(self._oldest_delta_base, self.version - len(self._history))
+
+            self.station_ids = station_ids
+            self.fields = fields
+            self._last_values = values
+            return self.version
+
+    def can_delta(self, since_version):
+        return since_version is not None and self._oldest_delta_base <= since_version <= self.version
+
+    def changes_since(self, since_version, stations):
+        """
+        Returns {field: (station_ids, values)} for every cell changed after `since_version`,
+        read from `stations` (the frame that was last recorded). None means a full resync is needed.
+        """
+        with self._lock:
+            if not self.can_delta(since_version):
+                return None
+
+            changed = np.zeros((len(self.station_ids), len(self.fields)), dtype=bool)
+            for version, mask in self._history:
+                if version > since_version:
+                    changed |= mask
+
+            changes = {}
+            for j, field in enumerate(self.fields):
+                rows = np.flatnonzero(changed[:, j])
+                if len(rows):
+                    changes[field] = (stations['station_id'].iloc[rows], stations[field].iloc[rows])
+            return changes
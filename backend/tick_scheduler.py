@@ -0,0 +1,71 @@
+import asyncio
+import os
+
+# Seconds between server-driven simulation ticks; 0 disables the scheduler (clients tick via POST)
+DEFAULT_TICK_SECONDS = 10.0
+TICK_SECONDS_ENV = 'SNTRY_TICK_SECONDS'
+
+def tick_interval_from_env():
+    try:
+        return max(0.0, float(os.environ.get(TICK_SECONDS_ENV, DEFAULT_TICK_SECONDS)))
+    except ValueError:
+        print(f"Ignoring invalid {TICK_SECONDS_ENV}={os.environ.get(TICK_SECONDS_ENV)!r}")
+        return DEFAULT_TICK_SECONDS
+
+class TickScheduler:
+    """
+    Advances the shared simulation once per interval on a background asyncio task and pushes the
+    encoded result to every subscriber, so the tick costs the same no matter how many dashboards
+    are open. `tick_fn` is a blocking callable returning (version, payload bytes); it runs in a
+    worker thread to keep the event loop free for requests. Subscribers receive the same pairs, so
+    they can skip events older than a snapshot they already sent.
+    """
+    def __init__(self, tick_fn, interval_seconds=DEFAULT_TICK_SECONDS, queue_size=8):
+        self.tick_fn = tick_fn
+        self.interval_seconds = interval_seconds
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.interval_seconds > 0 and not self.running:
+            self._task = asyncio.create_task(self._run())
+            print(f"Simulation tick scheduler started ({self.interval_seconds:g}s interval).")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def _publish(self, event):
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow client: drop its oldest event (it will notice the version gap and resync)
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                event = await asyncio.to_thread(self.tick_fn)
+            except Exception as e:
+                print(f"Scheduled simulation tick failed: {e}")
+                continue
+            self._publish(event)
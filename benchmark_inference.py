@@ -0,0 +1,94 @@
+import os
+import time
+import argparse
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+
+from main import load_and_preprocess_data, chronological_split
+from compiled_forest import CompiledForest
+
+def latency_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.percentile(timings, 50) * 1000, np.percentile(timings, 99) * 1000
+
+def check_parity(model, forest, X):
+    """The compiled forest must reproduce sklearn's labels and probabilities on every holdout row."""
+    X_df = pd.DataFrame(X, columns=model.feature_names_in_) if hasattr(model, 'feature_names_in_') else X
+    labels, proba = forest.predict_with_proba(X)
+    sk_labels = model.predict(X_df)
+    sk_proba = model.predict_proba(X_df)
+
+    assert np.array_equal(labels, sk_labels), f"{int((labels != sk_labels).sum())} labels differ from sklearn"
+    max_diff = float(np.abs(proba - sk_proba).max())
+    assert max_diff < 1e-9, f"probabilities differ from sklearn by {max_diff}"
+
+    # Missing values take the same branch as in sklearn's trees
+    X_missing = X[:1000].copy()
+    X_missing[::3, 0] = np.nan
+    try:
+        sk_missing = model.predict(pd.DataFrame(X_missing, columns=X_df.columns) if hasattr(model, 'feature_names_in_') else X_missing)
+        assert np.array_equal(forest.predict(X_missing), sk_missing), "labels differ from sklearn on rows with missing values"
+    except ValueError:
+        # This sklearn version doesn't route NaN through forests
+        pass
+
+    # The exported arrays load back to the same model
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'compiled_forest.npz')
+        forest.save(path)
+        assert np.array_equal(CompiledForest.load(path).predict(X), labels), "save/load round trip changed predictions"
+
+    print(f"Parity OK on {len(X)} holdout rows (max probability difference {max_diff:.1e}).")
+
+def benchmark_inference(filepath, model_path, sample_frac, batch_sizes, repeats):
+    X, y, _ = load_and_preprocess_data(filepath, sample_frac=sample_frac)
+    _, X_test, _, _ = chronological_split(X, y, test_size=0.2)
+    X_test = X_test.to_numpy(dtype=np.float32)
+
+    model = joblib.load(model_path)
+    start = time.perf_counter()
+    forest = CompiledForest.from_sklearn(model)
+    print(f"Compiled {forest.n_estimators} trees ({len(forest.feature)} nodes, {forest.nbytes / 1e6:.1f} MB) in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    print("\n--- Checking Parity ---\n")
+    check_parity(model, forest, X_test)
+
+    results = []
+    print("\n--- Starting Inference Latency Benchmark ---\n")
+    for batch_size in batch_sizes:
+        batch = X_test[:batch_size]
+        batch_df = pd.DataFrame(batch, columns=model.feature_names_in_) if hasattr(model, 'feature_names_in_') else batch
+        runs = repeats if batch_size <= 1000 else max(5, repeats // 10)
+
+        # The API needs both the label and the probabilities
+        sk_p50, sk_p99 = latency_ms(lambda: (model.predict(batch_df), model.predict_proba(batch_df)), runs)
+        compiled_p50, compiled_p99 = latency_ms(lambda: forest.predict_with_proba(batch), runs)
+        results.append({
+            "Batch": len(batch),
+            "sklearn p50 (ms)": round(sk_p50, 2),
+            "sklearn p99 (ms)": round(sk_p99, 2),
+            "Compiled p50 (ms)": round(compiled_p50, 2),
+            "Compiled p99 (ms)": round(compiled_p99, 2),
+            "Speedup (p50)": round(sk_p50 / compiled_p50, 1)
+        })
+        print(f"  batch {len(batch)}: sklearn {sk_p50:.2f} ms, compiled {compiled_p50:.2f} ms (p50)")
+
+    print("\n--- Final Results Spreadsheet ---")
+    print(pd.DataFrame(results).to_string(index=False))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity and latency of the compiled forest against the sklearn model.")
+    parser.add_argument('--data', default='ev_charging_station_data 2.csv')
+    parser.add_argument('--model', default='predictive_maintenance_model.pkl')
+    parser.add_argument('--sample-frac', type=float, default=0.1, help="Most recent fraction of rows to evaluate on.")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 150, 1000, 10_000])
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    benchmark_inference(args.data, args.model, args.sample_frac, args.batch_sizes, args.repeats)
@@ -0,0 +1,96 @@
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from data_manager import DataManager
+from serialization import frame_to_records, frame_to_json_bytes
+
+FLEET_SIZES = [150, 10_000, 100_000]
+
+def build_fleet(base, size):
+    """Tiles the sampled stations into a fleet of `size` stations with unique ids and fake predictions."""
+    reps = int(np.ceil(size / len(base)))
+    fleet = pd.concat([base] * reps, ignore_index=True).iloc[:size].copy()
+    fleet['station_id'] = [f"BENCH-{i:06d}" for i in range(size)]
+
+    rng = np.random.default_rng(42)
+    fleet['predicted_status'] = rng.choice(['operational', 'offline', 'partial_outage'], size)
+    fleet['risk_score'] = rng.random(size)
+    fleet['needs_maintenance'] = fleet['risk_score'] > 0.45
+    fleet['root_cause_diagnosis'] = np.where(fleet['needs_maintenance'], "Heat-Induced Hardware Degradation (Temp > 95°F)", "Nominal")
+    return fleet
+
+def legacy_path(fleet):
+    """replace + dtype loop + to_dict, per-dict enrichment, then what FastAPI's JSONResponse does."""
+    prediction_cols = ['predicted_status', 'risk_score', 'needs_maintenance', 'root_cause_diagnosis']
+    stations = frame_to_records(fleet.drop(columns=prediction_cols))
+    for i, station in enumerate(stations):
+        station['predicted_status'] = fleet['predicted_status'].iat[i]
+        station['risk_score'] = float(fleet['risk_score'].iat[i])
+        station['needs_maintenance'] = bool(fleet['needs_maintenance'].iat[i])
+        station['root_cause_diagnosis'] = fleet['root_cause_diagnosis'].iat[i]
+    return json.dumps(jsonable_encoder(stations), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode('utf-8')
+
+def fast_path(fleet):
+    return frame_to_json_bytes(fleet)
+
+def payloads_match(a, b):
+    """
+    Decoded payloads are equal, floats up to the last of the 15 decimals pandas' JSON encoder
+    writes (its rounding of that digit can differ from Python's repr).
+    """
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and math.isclose(a, b, rel_tol=1e-15, abs_tol=1e-14)
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(payloads_match(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(payloads_match(x, y) for x, y in zip(a, b))
+    return a == b
+
+def time_call(fn, arg, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def benchmark_serialization():
+    filepath = 'ev_charging_station_data 2.csv'
+    db = DataManager(filepath, num_stations=150)
+    db.load_data()
+
+    results = []
+    print("\n--- Starting Serialization Benchmark ---\n")
+    for size in FLEET_SIZES:
+        fleet = build_fleet(db.active_stations, size)
+        repeats = 5 if size <= 10_000 else 2
+
+        # Both paths must agree on the payload before their timings mean anything
+        legacy_json = json.loads(legacy_path(fleet))
+        fast_json = json.loads(fast_path(fleet))
+        assert len(legacy_json) == size
+        assert payloads_match(legacy_json, fast_json), "fast path payload differs from the legacy path"
+
+        legacy_s = time_call(legacy_path, fleet, repeats)
+        fast_s = time_call(fast_path, fleet, repeats)
+        results.append({
+            "Stations": size,
+            "Legacy (ms)": round(legacy_s * 1000, 1),
+            "Fast (ms)": round(fast_s * 1000, 1),
+            "Speedup": round(legacy_s / fast_s, 1),
+            "Payload (MB)": round(len(fast_path(fleet)) / 1e6, 2)
+        })
+        print(f"  {size} stations: legacy {legacy_s * 1000:.1f} ms, fast {fast_s * 1000:.1f} ms")
+
+    print("\n--- Final Results Spreadsheet ---")
+    print(pd.DataFrame(results).to_string(index=False))
+
+if __name__ == "__main__":
+    benchmark_serialization()
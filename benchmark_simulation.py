@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from data_manager import DataManager
+from sharded_simulation import ShardedSimulation
+
+def time_ticks(tick, timestamps):
+    timings = []
+    for ts in timestamps:
+        start = time.perf_counter()
+        tick(ts)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings)
+
+def benchmark_simulation(filepath, num_stations, shard_counts, num_ticks, shard_by):
+    timestamps = [ts.isoformat() for ts in pd.date_range('2024-07-01', periods=num_ticks, freq='h')]
+    results = []
+    print("\n--- Starting Simulation Tick Benchmark ---\n")
+
+    db = DataManager(filepath, num_stations=num_stations)
+    db.load_data()
+    single_s = time_ticks(lambda ts: db.simulate_live_tick(ts, return_stations=False), timestamps)
+    results.append({"Mode": "single process", "Workers": 1, "Tick p50 (ms)": round(single_s * 1000, 1), "Speedup": 1.0})
+    print(f"  single process: {single_s * 1000:.1f} ms per tick")
+    del db
+
+    for num_shards in shard_counts:
+        with ShardedSimulation(filepath, num_stations=num_stations, num_shards=num_shards, shard_by=shard_by, seed=42) as sim:
+            sharded_s = time_ticks(sim.simulate_live_tick, timestamps)
+        results.append({
+            "Mode": f"sharded by {shard_by}",
+            "Workers": num_shards,
+            "Tick p50 (ms)": round(sharded_s * 1000, 1),
+            "Speedup": round(single_s / sharded_s, 2)
+        })
+        print(f"  {num_shards} shards: {sharded_s * 1000:.1f} ms per tick")
+
+    print("\n--- Final Results Spreadsheet ---")
+    print(pd.DataFrame(results).to_string(index=False))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Single-process vs process-sharded live simulation tick latency.")
+    parser.add_argument('--data', default='ev_charging_station_data 2.csv')
+    parser.add_argument('--stations', type=int, default=100_000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[2, 4, os.cpu_count() or 1])
+    parser.add_argument('--ticks', type=int, default=20)
+    parser.add_argument('--shard-by', default='station_id', help="'station_id' or a region column such as 'state'")
+    args = parser.parse_args()
+
+    benchmark_simulation(args.data, args.stations, sorted(set(args.shards)), args.ticks, args.shard_by)
@@ -0,0 +1,134 @@
+import numpy as np
+
+# Rows traversed together; bounds the [rows x trees] node-index matrices
+ROW_BLOCK = 4096
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous NumPy arrays: every tree's nodes
+    live in one feature/threshold/children/value table, and all trees are walked together, one
+    depth level per step, for a whole batch of rows. predict() and predict_proba() come out of the
+    same traversal, without sklearn's per-call validation and joblib dispatch.
+    Exposes classes_, feature_names_in_ and the predict API, so it can stand in for the sklearn model.
+    """
+    def __init__(self, feature, threshold, children, missing_right, value, roots, max_depth, classes, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_right = missing_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        features, thresholds, children, missing_right, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            leaf = tree.children_left == -1
+            node_ids = np.arange(offset, offset + n)
+
+            # Leaves point at themselves, so walking past a leaf is a no-op and no per-step leaf test is needed
+            left = np.where(leaf, node_ids, tree.children_left + offset)
+            right = np.where(leaf, node_ids, tree.children_right + offset)
+            features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            children.append(np.column_stack([left, right]).astype(np.int32))
+            if hasattr(tree, 'missing_go_to_left'):
+                missing_right.append(~tree.missing_go_to_left.astype(bool) & ~leaf)
+            else:
+                missing_right.append(np.zeros(n, dtype=bool))
+
+            # Same per-tree normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            missing_right=np.concatenate(missing_right),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+            classes=np.asarray(forest.classes_),
+            feature_names=getattr(forest, 'feature_names_in_', None)
+        )
+
+    # --- Export ---
+
+    def save(self, path):
+        arrays = {
+            "feature": self.feature, "threshold": self.threshold, "children": self.children,
+            "missing_right": self.missing_right, "value": self.value, "roots": self.roots,
+            "max_depth": np.array(self.max_depth), "classes": self.classes_.astype(str)
+        }
+        if hasattr(self, 'feature_names_in_'):
+            arrays["feature_names"] = self.feature_names_in_.astype(str)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                feature=data["feature"], threshold=data["threshold"], children=data["children"],
+                missing_right=data["missing_right"], value=data["value"], roots=data["roots"],
+                max_depth=data["max_depth"], classes=data["classes"].astype(object),
+                feature_names=data["feature_names"].astype(object) if "feature_names" in data else None
+            )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.feature, self.threshold, self.children, self.missing_right, self.value, self.roots))
+
+    # --- Inference ---
+
+    def _leaves(self, X):
+        """Leaf node of every (row, tree) pair."""
+        # Flat gathers (np.take on raveled arrays) are much cheaper than 2-D fancy indexing
+        X_flat = X.ravel()
+        row_offsets = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        children_flat = self.children.ravel()
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        check_missing = np.isnan(X).any()
+        for _ in range(self.max_depth):
+            x = np.take(X_flat, row_offsets + np.take(self.feature, node))
+            # float32 inputs are compared against float64 thresholds, exactly like sklearn's trees
+            go_right = x > np.take(self.threshold, node)
+            if check_missing:
+                go_right |= np.isnan(x) & np.take(self.missing_right, node)
+            node = np.take(children_flat, 2 * node + go_right)
+        return node
+
+    def predict_with_proba(self, X):
+        """(labels, probabilities) from one traversal; labels are the argmax class, as in sklearn."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        proba = np.zeros((len(X), len(self.classes_)))
+        for start in range(0, len(X), ROW_BLOCK):
+            leaves = self._leaves(X[start:start + ROW_BLOCK])
+            block = proba[start:start + ROW_BLOCK]
+            # Trees are summed one at a time, the way the forest accumulates them
+            for t in range(leaves.shape[1]):
+                block += self.value[leaves[:, t]]
+        proba /= len(self.roots)
+        return self.classes_.take(np.argmax(proba, axis=1)), proba
+
+    def predict_proba(self, X):
+        return self.predict_with_proba(X)[1]
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
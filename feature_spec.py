@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# The model's feature contract, shared by training (main.py) and serving (backend/api.py):
+# which telemetry columns are features, which are label-encoded, and how a frame becomes the
+# float32 matrix the model consumes.
+
+# Columns that leak the status or are identifiers and not helpful for generalized prediction
+COLUMNS_TO_DROP = [
+    'station_id', 'station_name', 'timestamp', 'city', 'state',
+    'latitude', 'longitude', 'amenities_nearby',
+    'ports_available', 'ports_occupied', 'ports_out_of_service'
+]
+
+CATEGORICAL_COLS = [
+    'network', 'location_type', 'charger_type',
+    'pricing_type', 'weather_condition', 'local_event'
+]
+
+# Target variable for Predictive Maintenance
+TARGET_COL = 'station_status'
+
+# Columns the backend adds to station rows, never seen by the model
+SERVING_ONLY_COLS = ['revenue_at_risk_daily', 'historical_utilization_avg']
+
+def feature_names(columns):
+    """Model features among `columns`, in the order training sees them."""
+    excluded = set(COLUMNS_TO_DROP) | set(SERVING_ONLY_COLS) | {TARGET_COL}
+    return [col for col in columns if col not in excluded]
+
+def model_feature_names(model, columns=None):
+    """The fitted model's feature order (feature_names_in_), or the spec's order for `columns`."""
+    if hasattr(model, 'feature_names_in_'):
+        return list(model.feature_names_in_)
+    return feature_names(columns)
+
+class CompiledEncoder:
+    """
+    A fitted LabelEncoder turned into a hash lookup table, built once at model load. Values the
+    encoder never saw get `unknown_code` (the code of classes_[0], as serving always did) instead of
+    raising, and categorical columns are encoded through their categories, once per category.
+    """
+    def __init__(self, encoder):
+        self.classes = np.asarray(encoder.classes_).astype(str).astype(object)
+        self.lookup = pd.Index(self.classes)
+        self.unknown_code = 0
+        # Training fills missing values with 0 before encoding, so a missing value is the string '0'
+        self.missing_code = self._codes(np.array(['0'], dtype=object))[0]
+
+    def _codes(self, values):
+        codes = self.lookup.get_indexer(values)
+        return np.where(codes >= 0, codes, self.unknown_code)
+
+    def encode(self, values):
+        """Codes for a column (Series, Categorical or array) as an int array."""
+        if isinstance(values, pd.Series):
+            values = values.array
+        if isinstance(values, pd.Categorical):
+            # Encode the few categories, then gather by the per-row category codes (-1 = missing)
+            table = np.append(self._codes(values.categories.astype(str).to_numpy(dtype=object)), self.missing_code)
+            return table[values.codes]
+        values = np.asarray(values, dtype=object)
+        missing = pd.isna(values)
+        codes = self.lookup.get_indexer(values)
+        # Only values that aren't already matching strings (numbers, numpy scalars) go through str()
+        retry = (codes < 0) & ~missing
+        if retry.any():
+            codes[retry] = self.lookup.get_indexer(values[retry].astype(str))
+        codes = np.where(codes >= 0, codes, self.unknown_code)
+        return np.where(missing, self.missing_code, codes)
+
+def compile_encoders(encoders):
+    """{column: LabelEncoder} -> {column: CompiledEncoder} (already compiled entries are kept)."""
+    return {
+        col: encoder if isinstance(encoder, CompiledEncoder) else CompiledEncoder(encoder)
+        for col, encoder in (encoders or {}).items()
+    }
+
+def build_feature_matrix(stations, names, encoders=None):
+    """
+    Builds the model input for every row of `stations` in one pass: a float32 array of shape
+    [rows x len(names)], columns in `names` order. Missing values become 0 and categorical
+    columns are label-encoded, as in training; columns the frame lacks are all 0.
+    Pass compile_encoders() output to avoid recompiling the encoders on every call.
+    """
+    encoders = compile_encoders(encoders)
+    X = np.zeros((len(stations), len(names)), dtype=np.float32)
+    for j, col in enumerate(names):
+        if col not in stations.columns:
+            continue
+        if col in encoders:
+            X[:, j] = encoders[col].encode(stations[col])
+        else:
+            X[:, j] = np.nan_to_num(stations[col].to_numpy(dtype=np.float32, na_value=np.nan), nan=0.0)
+    return X
+
+def feature_frame(X, names):
+    """Wraps a feature matrix in a DataFrame (no copy) so models fitted on named columns accept it."""
+    return pd.DataFrame(X, columns=names, copy=False)
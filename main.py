@@ -1,67 +1,174 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.metrics import classification_report, confusion_matrix, f1_score
 import joblib
+import argparse
+import copy
+import json
+import os
+import shutil
+import time
+from telemetry_store import (
+    load_telemetry, telemetry_columns, telemetry_row_count, iter_month_frames, get_cache_dir
+)
+from compiled_forest import CompiledForest
+from feature_spec import COLUMNS_TO_DROP, CATEGORICAL_COLS, TARGET_COL, feature_names, build_feature_matrix, compile_encoders
 
 def load_and_preprocess_data(filepath, sample_frac=0.1):
     """
     Loads and preprocesses the EV Charging Station dataset for predictive maintenance.
     """
     print(f"Loading data from {filepath} (sample_frac={sample_frac})...")
-    df = pd.read_csv(filepath)
+    # Only read the columns the model uses (plus timestamp for ordering) from the columnar cache.
+    # The cache already stores parsed timestamps, and for small fractions only the newest months are read.
+    columns = [col for col in telemetry_columns(filepath) if col not in COLUMNS_TO_DROP or col == 'timestamp']
+    last_n_rows = None
+    if sample_frac < 1.0:
+        total_rows = telemetry_row_count(filepath)
+        if total_rows is not None:
+            last_n_rows = int(total_rows * sample_frac)
+    df = load_telemetry(filepath, columns=columns, last_n_rows=last_n_rows)
     
-    # Ensure timestamp is a datetime object so we can sort chronologically
-    if 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp', ascending=True)
+    # Ensure rows are in chronological order (a no-op scan when the cache already sorted them),
+    # undated rows first like the streaming path
+    if 'timestamp' in df.columns and not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', ascending=True, kind='stable', na_position='first')
     
     # Take chronological sample representing the oldest/newest combined if frac < 1.0
     # Or just use the whole sorted dataframe
     if sample_frac < 1.0:
         # To maintain chronological order but reduce size, take the most recent fraction
         # as that's the most relevant for predicting future events.
-        num_rows = int(len(df) * sample_frac)
+        num_rows = last_n_rows if last_n_rows is not None else int(len(df) * sample_frac)
         df = df.tail(num_rows).copy()
     
     print(f"Data shape after sampling: {df.shape}")
 
-    # Columns that leak the status or are identifiers and not helpful for generalized prediction
-    columns_to_drop = [
-        'station_id', 'station_name', 'timestamp', 'city', 'state',
-        'latitude', 'longitude', 'amenities_nearby', 
-        'ports_available', 'ports_occupied', 'ports_out_of_service'
-    ]
-    df = df.drop(columns=columns_to_drop, errors='ignore')
+    df = df.drop(columns=COLUMNS_TO_DROP, errors='ignore')
     
     # Handle any potential missing values (using ffill for time-series-like continuity if needed, 
     # though sampling randomized the order, so just filling with 0 or median is safer.)
     df = df.fillna(0)
     
     print("Encoding categorical features...")
-    categorical_cols = [
-        'network', 'location_type', 'charger_type', 
-        'pricing_type', 'weather_condition', 'local_event'
-    ]
-    
     label_encoders = {}
-    for col in categorical_cols:
+    for col in CATEGORICAL_COLS:
         if col in df.columns:
             le = LabelEncoder()
             df[col] = le.fit_transform(df[col].astype(str))
             label_encoders[col] = le
             
-    # Target variable for Predictive Maintenance
-    target_col = 'station_status'
-    
-    X = df.drop(columns=[target_col])
-    y = df[target_col]
+    X = df[feature_names(df.columns)]
+    y = df[TARGET_COL]
     
     return X, y, label_encoders
 
+def build_encoded_feature_matrix(filepath, sample_frac=1.0, out_dir=None):
+    """
+    Out-of-core version of load_and_preprocess_data. Streams the dataset one month at a time:
+    the first pass only reads the categorical columns to fit the encoders, the second pass
+    encodes each month and writes it into a float32 feature matrix (and int8 target codes) on disk.
+    Peak memory is roughly one month of rows regardless of how many years the dataset covers.
+    """
+    if out_dir is None:
+        out_dir = os.path.join(get_cache_dir(filepath), 'features')
+    os.makedirs(out_dir, exist_ok=True)
+    
+    all_columns = telemetry_columns(filepath)
+    model_columns = [col for col in all_columns if col not in COLUMNS_TO_DROP or col == 'timestamp']
+    encoded_cols = [col for col in CATEGORICAL_COLS if col in all_columns]
+    
+    # Pass 1: collect categories, target classes and the row count (cheap, only a few columns are read)
+    print(f"Streaming pass 1/2 over {filepath}: fitting encoders...")
+    categories = {col: set() for col in encoded_cols}
+    class_labels = set()
+    total_rows = 0
+    for _, chunk in iter_month_frames(filepath, columns=encoded_cols + [TARGET_COL]):
+        total_rows += len(chunk)
+        for col in encoded_cols:
+            categories[col].update(chunk[col].fillna(0).astype(str).unique())
+        class_labels.update(chunk[TARGET_COL].fillna(0).unique())
+    
+    label_encoders = {}
+    for col in encoded_cols:
+        le = LabelEncoder()
+        le.fit(np.array(sorted(categories[col])))
+        label_encoders[col] = le
+    class_labels = sorted(class_labels, key=str)
+    
+    # Same chronological tail sampling as load_and_preprocess_data
+    num_rows = int(total_rows * sample_frac) if sample_frac < 1.0 else total_rows
+    skip_rows = total_rows - num_rows
+    names = feature_names(model_columns)
+    
+    print(f"Streaming pass 2/2: encoding {num_rows} rows x {len(names)} features to {out_dir}...")
+    X_path = os.path.join(out_dir, 'X.npy')
+    y_path = os.path.join(out_dir, 'y.npy')
+    X_out = np.lib.format.open_memmap(X_path, mode='w+', dtype=np.float32, shape=(num_rows, len(names)))
+    y_out = np.lib.format.open_memmap(y_path, mode='w+', dtype=np.int8, shape=(num_rows,))
+    
+    class_codes = {label: code for code, label in enumerate(class_labels)}
+    compiled_encoders = compile_encoders(label_encoders)
+    seen = 0
+    written = 0
+    for _, chunk in iter_month_frames(filepath, columns=model_columns):
+        if 'timestamp' in chunk.columns and not chunk['timestamp'].is_monotonic_increasing:
+            chunk = chunk.sort_values('timestamp', ascending=True, kind='stable', na_position='first')
+        
+        # Skip the oldest rows that fall outside the requested sample
+        start = max(0, skip_rows - seen)
+        seen += len(chunk)
+        if start >= len(chunk):
+            continue
+        chunk = chunk.iloc[start:].fillna(0)
+        
+        # Same feature builder the API uses at serving time
+        end = written + len(chunk)
+        X_out[written:end] = build_feature_matrix(chunk, names, compiled_encoders)
+        y_out[written:end] = chunk[TARGET_COL].map(class_codes).to_numpy(dtype=np.int8)
+        written = end
+    
+    X_out.flush()
+    y_out.flush()
+    del X_out, y_out
+    
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump({
+            "feature_names": names,
+            "class_labels": class_labels,
+            "rows": num_rows
+        }, f, indent=2)
+    
+    print(f"Encoded feature matrix written: {num_rows} rows.")
+    return out_dir, label_encoders
+
+def load_encoded_feature_matrix(out_dir):
+    """
+    Opens a matrix written by build_encoded_feature_matrix without loading it into RAM.
+    X is a DataFrame over the memory-mapped float32 array, y a Categorical over the int8 codes.
+    """
+    with open(os.path.join(out_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    
+    X_values = np.load(os.path.join(out_dir, 'X.npy'), mmap_mode='r')
+    y_codes = np.load(os.path.join(out_dir, 'y.npy'), mmap_mode='r')
+    
+    X = pd.DataFrame(X_values, columns=meta['feature_names'], copy=False)
+    y = pd.Series(pd.Categorical.from_codes(np.asarray(y_codes), categories=meta['class_labels']), name=TARGET_COL)
+    return X, y
+
+def chronological_split(X, y, test_size=0.2):
+    """
+    Equivalent to train_test_split(..., shuffle=False) but slices instead of copying,
+    so memory-mapped feature matrices stay on disk.
+    """
+    n_test = int(np.ceil(test_size * len(X)))
+    n_train = len(X) - n_test
+    return X.iloc[:n_train], X.iloc[n_train:], y.iloc[:n_train], y.iloc[n_train:]
+
 def train_predictive_maintenance_model(X, y):
     """
     Trains a Random Forest classifier to predict station status anomalies.
@@ -69,9 +176,7 @@ def train_predictive_maintenance_model(X, y):
     print("Splitting data into chronological time-series train/test sets...")
     # Because X and y are already sorted by time (oldest to newest), setting shuffle=False 
     # ensures the first 80% (older data) is used for training, and the newest 20% is testing.
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, shuffle=False
-    )
+    X_train, X_test, y_train, y_test = chronological_split(X, y, test_size=0.2)
     
     print("Training Random Forest Classifier (handling class imbalance)...")
     # Using class_weight='balanced' is critical here due to the vast majority of 'operational' logs.
@@ -128,23 +233,227 @@ def train_anomaly_clusterer(X, y):
     print("Successfully trained KMeans on failure prototypes.")
     return kmeans
 
+# Where --compress keeps every candidate's artifacts and the report
+CANDIDATES_DIR = 'model_candidates'
+# Inference latency is measured on batches the size of the fleet the API scores
+LATENCY_BATCH_SIZE = 150
+# Everything the API loads, in copy order (the compiled forest must not be older than the pickle)
+SERVING_ARTIFACTS = ['predictive_maintenance_model.pkl', 'compiled_forest.npz', 'label_encoders.pkl', 'anomaly_clusterer.pkl']
+# Records the candidate picked with --serve/--select-model, so retraining serves it again
+SERVING_SELECTION_PATH = 'serving.json'
+
+def build_compression_candidates(model, X_train, y_train, names=None):
+    """
+    Smaller alternatives to the trained forest: the same forest with fewer trees, shallower forests
+    retrained on the same rows, and a gradient-boosted model distilled from the forest's own predictions.
+    Returns {name: fitted model}, the original forest first. With `names`, only those candidates are built.
+    """
+    wanted = lambda name: names is None or name in names
+    candidates = {f"rf-{model.n_estimators}-d{model.max_depth}": model}
+    
+    # A forest's trees are independent, so keeping the first k of them is a valid smaller forest
+    for n_trees in (50, 25):
+        if n_trees < len(model.estimators_) and wanted(f"rf-{n_trees}-d{model.max_depth}"):
+            pruned = copy.copy(model)
+            pruned.estimators_ = model.estimators_[:n_trees]
+            pruned.n_estimators = n_trees
+            candidates[f"rf-{n_trees}-d{model.max_depth}"] = pruned
+    
+    for max_depth in (10, 8):
+        if not wanted(f"rf-50-d{max_depth}"):
+            continue
+        print(f"Training shallower forest (50 trees, max_depth={max_depth})...")
+        shallow = RandomForestClassifier(
+            n_estimators=50, 
+            max_depth=max_depth, 
+            class_weight='balanced', 
+            random_state=42, 
+            n_jobs=-1
+        )
+        candidates[f"rf-50-d{max_depth}"] = shallow.fit(X_train, y_train)
+    
+    # Distillation: the student learns the forest's (class-balanced) decisions, not the raw labels
+    if wanted("distilled-hgb"):
+        print("Distilling the forest into a gradient-boosted model...")
+        student = HistGradientBoostingClassifier(max_iter=100, max_depth=6, random_state=42)
+        candidates["distilled-hgb"] = student.fit(X_train, model.predict(X_train))
+    return {name: candidate for name, candidate in candidates.items() if wanted(name)}
+
+def save_serving_artifacts(model, encoders, clusterer, out_dir='.'):
+    """
+    Writes the full set the API loads into `out_dir`: the model pickle, the compiled forest (random
+    forests only), the label encoders and the clusterer. Artifacts this model doesn't have are removed,
+    so none is left over from a previous model. Returns the path the API would load the model from.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, name) for name in SERVING_ARTIFACTS}
+    joblib.dump(model, paths['predictive_maintenance_model.pkl'])
+    joblib.dump(encoders, paths['label_encoders.pkl'])
+    if clusterer is not None:
+        joblib.dump(clusterer, paths['anomaly_clusterer.pkl'])
+    elif os.path.exists(paths['anomaly_clusterer.pkl']):
+        os.remove(paths['anomaly_clusterer.pkl'])
+    
+    # Written after the pickle, so the API sees an up-to-date compiled forest
+    if isinstance(model, RandomForestClassifier):
+        CompiledForest.from_sklearn(model).save(paths['compiled_forest.npz'])
+        return paths['compiled_forest.npz']
+    if os.path.exists(paths['compiled_forest.npz']):
+        os.remove(paths['compiled_forest.npz'])
+    return paths['predictive_maintenance_model.pkl']
+
+def load_serving_artifact(path):
+    return CompiledForest.load(path) if path.endswith('.npz') else joblib.load(path)
+
+def _latency_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.percentile(timings, 50) * 1000, np.percentile(timings, 99) * 1000
+
+def compress_model(model, X, y, encoders, clusterer, out_dir=CANDIDATES_DIR, repeats=100):
+    """
+    Builds the compression candidates and measures each one the way the API would serve it:
+    weighted F1 on the chronological holdout, p50/p99 latency of one scoring call (label and
+    probabilities) on a fleet-sized batch, artifact size and load time. Every candidate is saved
+    under `out_dir`/<name>/ with the encoders and clusterer it was trained with, next to the report,
+    so the serving model can be picked afterwards (select_serving_model).
+    """
+    print("\n--- Model Compression ---")
+    os.makedirs(out_dir, exist_ok=True)
+    X_train, X_test, y_train, y_test = chronological_split(X, y, test_size=0.2)
+    candidates = build_compression_candidates(model, X_train, y_train)
+    
+    batch = X_test.iloc[:LATENCY_BATCH_SIZE]
+    batch_values = batch.to_numpy(dtype=np.float32)
+    report = []
+    for name, candidate in candidates.items():
+        serving_path = save_serving_artifacts(candidate, encoders, clusterer, os.path.join(out_dir, name))
+        
+        start = time.perf_counter()
+        served = load_serving_artifact(serving_path)
+        load_s = time.perf_counter() - start
+        
+        if hasattr(served, 'predict_with_proba'):
+            score = lambda: served.predict_with_proba(batch_values)
+        else:
+            score = lambda: (served.predict(batch), served.predict_proba(batch))
+        p50, p99 = _latency_ms(score, repeats)
+        
+        report.append({
+            "Model": name,
+            "Weighted F1": round(float(f1_score(y_test, candidate.predict(X_test), average='weighted')), 4),
+            f"p50 (ms, {len(batch)} rows)": round(p50, 2),
+            f"p99 (ms, {len(batch)} rows)": round(p99, 2),
+            "Artifact (MB)": round(os.path.getsize(serving_path) / 1e6, 2),
+            "Pickle (MB)": round(os.path.getsize(os.path.join(out_dir, name, 'predictive_maintenance_model.pkl')) / 1e6, 2),
+            "Load (ms)": round(load_s * 1000, 1)
+        })
+        print(f"  {name}: F1 {report[-1]['Weighted F1']}, p50 {p50:.2f} ms, {report[-1]['Artifact (MB)']} MB")
+    
+    report_df = pd.DataFrame(report)
+    with open(os.path.join(out_dir, 'report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print("\n--- Compression Report ---")
+    print(report_df.to_string(index=False))
+    return report_df
+
+def select_serving_model(name, candidates_dir=CANDIDATES_DIR):
+    """
+    Promotes a saved compression candidate to the set the API loads: its model, compiled forest,
+    encoders and clusterer are copied together, then the choice is recorded in serving.json.
+    """
+    candidate_dir = os.path.join(candidates_dir, name)
+    if not os.path.exists(os.path.join(candidate_dir, 'predictive_maintenance_model.pkl')):
+        available = sorted(
+            entry for entry in os.listdir(candidates_dir)
+            if os.path.exists(os.path.join(candidates_dir, entry, 'predictive_maintenance_model.pkl'))
+        ) if os.path.isdir(candidates_dir) else []
+        raise ValueError(f"Unknown model candidate '{name}'. Available: {', '.join(available) or 'none, run with --compress first'}")
+    if not os.path.exists(os.path.join(candidate_dir, 'label_encoders.pkl')):
+        # A model without the encoders it was trained with would be scored on mismatched codes
+        raise ValueError(f"Model candidate '{name}' has no saved encoders, rebuild the candidates with --compress.")
+    
+    for artifact in SERVING_ARTIFACTS:
+        if os.path.exists(os.path.join(candidate_dir, artifact)):
+            shutil.copyfile(os.path.join(candidate_dir, artifact), artifact)
+        elif os.path.exists(artifact):
+            os.remove(artifact)
+    
+    with open(SERVING_SELECTION_PATH, 'w') as f:
+        json.dump({"model": name}, f, indent=2)
+    print(f"Serving model set to '{name}'.")
+
+def read_serving_selection():
+    """The candidate name recorded by select_serving_model, or None when the full forest is served."""
+    if not os.path.exists(SERVING_SELECTION_PATH):
+        return None
+    with open(SERVING_SELECTION_PATH) as f:
+        return json.load(f).get("model")
+
+def rebuild_serving_candidate(name, model, X, y, encoders, clusterer, candidates_dir=CANDIDATES_DIR):
+    """
+    Rebuilds the selected candidate from a freshly trained forest and promotes it, so retraining keeps
+    serving the model that was chosen rather than the full forest. Returns False if the name can't be rebuilt.
+    """
+    X_train, _, y_train, _ = chronological_split(X, y, test_size=0.2)
+    candidates = build_compression_candidates(model, X_train, y_train, names=[name])
+    if name not in candidates:
+        return False
+    save_serving_artifacts(candidates[name], encoders, clusterer, os.path.join(candidates_dir, name))
+    select_serving_model(name, candidates_dir)
+    return True
+
 if __name__ == "__main__":
-    filepath = 'ev_charging_station_data 2.csv'
+    parser = argparse.ArgumentParser(description="Train the SNTRY predictive maintenance models.")
+    parser.add_argument('--data', default='ev_charging_station_data 2.csv', help="Path to the telemetry CSV.")
+    parser.add_argument('--sample-frac', type=float, default=1.0, help="Most recent fraction of rows to train on.")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Encode month by month into an on-disk feature matrix instead of loading everything into RAM.")
+    parser.add_argument('--compress', action='store_true',
+                        help=f"Also build smaller candidate models and write a size/latency/F1 report to {CANDIDATES_DIR}/.")
+    parser.add_argument('--serve', default=None,
+                        help=f"Candidate to serve (default: the one recorded in {SERVING_SELECTION_PATH}, else the full forest).")
+    parser.add_argument('--select-model', default=None,
+                        help=f"Promote a candidate saved in {CANDIDATES_DIR}/ to the serving model, without retraining.")
+    args = parser.parse_args()
+    filepath = args.data
     
-    # We use a 10% sample for rapid demonstration.
-    # To train on the full 1.3M rows, set sample_frac to 1.0.
-    X, y, encoders = load_and_preprocess_data(filepath, sample_frac=1.0)
+    if args.select_model:
+        select_serving_model(args.select_model)
+        raise SystemExit(0)
+    
+    # Use --sample-frac 0.1 for rapid demonstration.
+    # By default we train on the full 1.3M rows.
+    if args.streaming:
+        matrix_dir, encoders = build_encoded_feature_matrix(filepath, sample_frac=args.sample_frac)
+        X, y = load_encoded_feature_matrix(matrix_dir)
+    else:
+        X, y, encoders = load_and_preprocess_data(filepath, sample_frac=args.sample_frac)
     
     model, importances = train_predictive_maintenance_model(X, y)
     
     # Train the Anomaly Analyzer
     clusterer = train_anomaly_clusterer(X, y)
     
-    # Save the models and encoders for deployment in the AI Assistant
-    joblib.dump(model, 'predictive_maintenance_model.pkl')
-    joblib.dump(encoders, 'label_encoders.pkl')
-    
-    if clusterer:
-        joblib.dump(clusterer, 'anomaly_clusterer.pkl')
+    # Save the models and encoders for deployment in the AI Assistant, with a flattened
+    # copy of the forest for serving (loaded by the API instead of the pickle)
+    save_serving_artifacts(model, encoders, clusterer)
         
     print(f"\nModels and encoders saved successfully to disk.")
+    
+    # An explicit --serve wins, otherwise the candidate picked earlier keeps being served
+    serving = args.serve or read_serving_selection()
+    if args.compress:
+        compress_model(model, X, y, encoders, clusterer)
+        if serving:
+            select_serving_model(serving)
+    elif serving:
+        print(f"\nRebuilding the selected serving model '{serving}'...")
+        if not rebuild_serving_candidate(serving, model, X, y, encoders, clusterer):
+            print(f"Candidate '{serving}' can't be rebuilt from this forest, serving the full forest instead.")
+            if os.path.exists(SERVING_SELECTION_PATH):
+                os.remove(SERVING_SELECTION_PATH)
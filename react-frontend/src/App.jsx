@@ -45,40 +45,97 @@ export default function App() {
     fetchStations();
   }, [timeframe, roleMode]); // Added roleMode to dependencies to refetch when role changes
 
-  useEffect(() => {
-    if (viewMode === 'historical' || roleMode === 'client') return; // Stop polling if in client mode
-
-    // Poll for live simulation updates and system logs every 10 seconds
-    const interval = setInterval(async () => {
-      try {
-        const now = new Date().toISOString();
-        const res = await axios.post(`${API_BASE_URL}/api/simulation/tick`, { timestamp: now });
-        if (res.data.stations) {
-          setStations(res.data.stations);
+  const refreshLogs = async () => {
+    const logRes = await axios.get(`${API_BASE_URL}/api/logs`);
+    if (logRes.data.logs) {
+      const newLogs = logRes.data.logs;
+      setLogs(prevLogs => {
+        // Check if new logs were added that mention a traffic surge
+        if (prevLogs.length > 0 && newLogs.length > prevLogs.length) {
+          const latestLog = newLogs[newLogs.length - 1];
+          if (latestLog.action === 'TRAFFIC_SURGE_DETECTED' && latestLog.details) {
+            const stName = latestLog.details.station?.split('-')[1] || latestLog.details.station;
+            toast.error(`Traffic Surge Detected: ${stName}! Auto-Heal engaging...`, {
+              style: { background: '#FFF5F2', color: '#D16E1E', border: '1px solid #FB923C' },
+              duration: 4000
+            });
+          }
         }
-        const logRes = await axios.get(`${API_BASE_URL}/api/logs`);
-        if (logRes.data.logs) {
-          const newLogs = logRes.data.logs;
-          setLogs(prevLogs => {
-            // Check if new logs were added that mention a traffic surge
-            if (prevLogs.length > 0 && newLogs.length > prevLogs.length) {
-              const latestLog = newLogs[newLogs.length - 1];
-              if (latestLog.action === 'TRAFFIC_SURGE_DETECTED' && latestLog.details) {
-                const stName = latestLog.details.station?.split('-')[1] || latestLog.details.station;
-                toast.error(`Traffic Surge Detected: ${stName}! Auto-Heal engaging...`, {
-                  style: { background: '#FFF5F2', color: '#D16E1E', border: '1px solid #FB923C' },
-                  duration: 4000
-                });
-              }
-            }
-            return newLogs;
+        return newLogs;
+      });
+    }
+  };
+
+  useEffect(() => {
+    if (viewMode === 'historical' || roleMode === 'client') return; // Stop live updates if in client mode
+
+    // The server ticks the shared simulation on its own clock and pushes each tick over
+    // Server-Sent Events: a full snapshot first, then per-field deltas against the previous version
+    let source = null;
+    let interval = null;
+    let version = null;
+    let received = false;
+
+    const openStream = () => {
+      source = new EventSource(`${API_BASE_URL}/api/simulation/stream`);
+      source.addEventListener('tick', async (event) => {
+        received = true;
+        const tick = JSON.parse(event.data);
+        if (tick.full) {
+          setStations(tick.stations);
+        } else if (tick.since_version === version) {
+          setStations(prev => {
+            const byId = new Map(prev.map(s => [s.station_id, { ...s }]));
+            Object.entries(tick.changes).forEach(([field, { station_ids, values }]) => {
+              station_ids.forEach((id, i) => {
+                if (byId.has(id)) byId.get(id)[field] = values[i];
+              });
+            });
+            return Array.from(byId.values());
           });
+        } else {
+          // Missed a tick, reconnect to start again from a full snapshot
+          source.close();
+          openStream();
+          return;
         }
-      } catch (err) {
-        console.error("Live simulation tick failed", err);
-      }
-    }, 10000);
-    return () => clearInterval(interval);
+        version = tick.version;
+        try {
+          await refreshLogs();
+        } catch (err) {
+          console.error("Failed to fetch logs", err);
+        }
+      });
+      source.onerror = () => {
+        if (!received) {
+          // Server-side scheduler disabled: fall back to advancing the simulation from the client
+          source.close();
+          startPolling();
+        }
+      };
+    };
+
+    const startPolling = () => {
+      // Poll for live simulation updates and system logs every 10 seconds
+      interval = setInterval(async () => {
+        try {
+          const now = new Date().toISOString();
+          const res = await axios.post(`${API_BASE_URL}/api/simulation/tick`, { timestamp: now });
+          if (res.data.stations) {
+            setStations(res.data.stations);
+          }
+          await refreshLogs();
+        } catch (err) {
+          console.error("Live simulation tick failed", err);
+        }
+      }, 10000);
+    };
+
+    openStream();
+    return () => {
+      if (source) source.close();
+      if (interval) clearInterval(interval);
+    };
   }, [viewMode, roleMode]); // Added roleMode to dependencies
 
   // Toast alerts for high risk stations (above 60%)
@@ -0,0 +1,459 @@
+import os
+import json
+import shutil
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # The columnar cache is an optimization, plain CSV still works without it
+    pa = None
+    feather = None
+
+# Bump this whenever the on-disk layout changes so stale caches are rebuilt automatically
+CACHE_FORMAT_VERSION = 3
+STATION_INDEX_FILE = 'station_index.feather'
+# Partition for rows without a parseable timestamp; sorts before every 'YYYY-MM' month, i.e. oldest
+UNDATED_PARTITION = '0000-undated'
+
+# Explicit dtypes for the telemetry CSV so pandas never has to sniff 1.3M rows to guess them
+STRING_COLUMNS = [
+    'station_id', 'station_name', 'city', 'state', 'network', 'location_type',
+    'charger_type', 'pricing_type', 'weather_condition', 'local_event',
+    'amenities_nearby', 'station_status'
+]
+FLOAT_COLUMNS = [
+    'latitude', 'longitude', 'power_output_kw', 'utilization_rate',
+    'estimated_wait_time_mins', 'avg_session_duration_mins', 'current_price',
+    'temperature_f', 'precipitation_mm', 'gas_price_per_gallon', 'traffic_congestion_index'
+]
+INT_COLUMNS = [
+    'ports_total', 'ports_available', 'ports_occupied', 'ports_out_of_service',
+    'hour_of_day', 'day_of_week', 'month'
+]
+BOOL_COLUMNS = ['is_weekend', 'is_peak_hour']
+
+CSV_DTYPES = {}
+CSV_DTYPES.update({col: 'object' for col in STRING_COLUMNS})
+CSV_DTYPES.update({col: 'float64' for col in FLOAT_COLUMNS})
+CSV_DTYPES.update({col: 'Int64' for col in INT_COLUMNS})
+CSV_DTYPES.update({col: 'boolean' for col in BOOL_COLUMNS})
+
+CSV_CHUNKSIZE = 250_000
+
+
+def get_cache_dir(csv_path):
+    """Returns the cache directory that sits next to the CSV it was converted from."""
+    csv_path = os.path.abspath(csv_path)
+    stem = os.path.splitext(os.path.basename(csv_path))[0].replace(' ', '_')
+    return os.path.join(os.path.dirname(csv_path), '.sntry_cache', stem)
+
+
+def _arrow_type(col, inferred):
+    """Pins the Arrow type of every known column so an all-null chunk can't change the schema."""
+    if col in STRING_COLUMNS:
+        return pa.string()
+    if col in FLOAT_COLUMNS:
+        return pa.float64()
+    if col in INT_COLUMNS:
+        return pa.int64()
+    if col in BOOL_COLUMNS:
+        return pa.bool_()
+    if col == 'timestamp':
+        return pa.timestamp('ns')
+    return inferred
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_cache_fresh(csv_path):
+    """True when the columnar cache exists and was built from the current version of the CSV."""
+    manifest = _read_manifest(get_cache_dir(csv_path))
+    if manifest is None:
+        return False
+    return (
+        manifest.get('format_version') == CACHE_FORMAT_VERSION and
+        manifest.get('source') == _source_signature(csv_path)
+    )
+
+
+def read_csv_chunks(csv_path, chunksize=CSV_CHUNKSIZE, columns=None):
+    """Streams the raw CSV with explicit dtypes and a parsed timestamp column."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    dtypes = {col: dtype for col, dtype in CSV_DTYPES.items() if col in header}
+    usecols = [col for col in header if col in columns] if columns is not None else None
+
+    for chunk in pd.read_csv(csv_path, dtype=dtypes, usecols=usecols, chunksize=chunksize):
+        if 'timestamp' in chunk.columns:
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+        yield chunk
+
+
+def build_columnar_cache(csv_path, chunksize=CSV_CHUNKSIZE):
+    """
+    Converts the telemetry CSV into one uncompressed Feather (Arrow IPC) file per calendar month.
+    Each month file is sorted by (station_id, timestamp) so every station occupies one contiguous
+    row range, which is recorded in a station index next to the month files.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required to build the columnar telemetry cache.")
+
+    cache_dir = get_cache_dir(csv_path)
+    build_dir = f"{cache_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+
+    print(f"Building columnar cache for {csv_path}...")
+    source = _source_signature(csv_path)
+    schema = None
+    writers = {}
+    try:
+        # Pass 1: stream the CSV and append every chunk to its month's file
+        for chunk in read_csv_chunks(csv_path, chunksize=chunksize):
+            # Undated rows get their own partition instead of silently falling out of the groupby
+            chunk_months = chunk['timestamp'].dt.strftime('%Y-%m').fillna(UNDATED_PARTITION)
+            for month_key, month_rows in chunk.groupby(chunk_months, sort=False):
+                table = pa.Table.from_pandas(month_rows, preserve_index=False)
+                if schema is None:
+                    schema = pa.schema([
+                        pa.field(field.name, _arrow_type(field.name, field.type))
+                        for field in table.schema
+                    ])
+                table = table.cast(schema)
+
+                if month_key not in writers:
+                    path = os.path.join(build_dir, f"{month_key}.feather")
+                    writers[month_key] = pa.ipc.new_file(path, schema)
+                writers[month_key].write_table(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    # Pass 2: sort each month in place, a month comfortably fits in memory even when the CSV does not
+    months = []
+    index_parts = []
+    for month_key in sorted(writers):
+        path = os.path.join(build_dir, f"{month_key}.feather")
+        table = feather.read_table(path, memory_map=False)
+        table = table.sort_by([('station_id', 'ascending'), ('timestamp', 'ascending')])
+        feather.write_feather(table, path, compression='uncompressed')
+        months.append({"month": month_key, "rows": table.num_rows})
+        index_parts.append(_station_ranges(table, month_key))
+
+    # station_id -> (month, offset, length) lets loaders read just the stations they need
+    if index_parts:
+        station_index = pd.concat(index_parts, ignore_index=True)
+        feather.write_feather(station_index, os.path.join(build_dir, STATION_INDEX_FILE), compression='uncompressed')
+
+    manifest = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source": source,
+        "columns": schema.names if schema is not None else [],
+        "months": months,
+        "rows": sum(m['rows'] for m in months)
+    }
+    with open(os.path.join(build_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the finished cache into place so readers never see a half-built directory:
+    # the old cache is renamed aside first, so the swap itself is a single rename
+    old_dir = f"{cache_dir}.old-{os.getpid()}"
+    if os.path.exists(cache_dir):
+        os.replace(cache_dir, old_dir)
+    os.replace(build_dir, cache_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    undated = next((m['rows'] for m in months if m['month'] == UNDATED_PARTITION), 0)
+    if undated:
+        print(f"Warning: {undated} rows have no valid timestamp, kept in the '{UNDATED_PARTITION}' partition.")
+    print(f"Columnar cache ready: {manifest['rows']} rows across {len(months)} months.")
+    return manifest
+
+
+def _station_ranges(table, month_key):
+    """Finds the contiguous row range of every station in a month table sorted by station_id."""
+    station_ids = table.column('station_id').to_pandas().to_numpy(dtype=object)
+    if len(station_ids) == 0:
+        return pd.DataFrame({'station_id': [], 'month': [], 'offset': [], 'length': []})
+    starts = np.flatnonzero(np.r_[True, station_ids[1:] != station_ids[:-1]])
+    lengths = np.diff(np.r_[starts, len(station_ids)])
+    return pd.DataFrame({
+        'station_id': station_ids[starts],
+        'month': month_key,
+        'offset': starts.astype(np.int64),
+        'length': lengths.astype(np.int64)
+    })
+
+
+def _acquire_file_lock(lock_file, timeout):
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        return
+    # Windows: byte-range lock on the lock file, retried until the other builder is done
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def _release_file_lock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _cache_build_lock(cache_dir, timeout=600):
+    """
+    Exclusive lock shared by every process using this cache (e.g. several uvicorn workers),
+    so only one of them rebuilds it while the others wait for the result.
+    """
+    os.makedirs(os.path.dirname(cache_dir), exist_ok=True)
+    with open(f"{cache_dir}.lock", 'a+') as lock_file:
+        _acquire_file_lock(lock_file, timeout)
+        try:
+            yield
+        finally:
+            _release_file_lock(lock_file)
+
+
+def ensure_columnar_cache(csv_path):
+    """Returns the cache manifest, rebuilding the cache first if the CSV changed. None without pyarrow."""
+    if pa is None:
+        return None
+    if not is_cache_fresh(csv_path):
+        with _cache_build_lock(get_cache_dir(csv_path)):
+            # Another process may have rebuilt it while we waited for the lock
+            if not is_cache_fresh(csv_path):
+                return build_columnar_cache(csv_path)
+    return _read_manifest(get_cache_dir(csv_path))
+
+
+def telemetry_columns(csv_path):
+    """Lists the columns available in the telemetry dataset without reading any rows."""
+    manifest = ensure_columnar_cache(csv_path)
+    if manifest is None:
+        return list(pd.read_csv(csv_path, nrows=0).columns)
+    return list(manifest['columns'])
+
+
+def telemetry_row_count(csv_path):
+    """Total number of rows in the dataset according to the cache manifest, None without a cache."""
+    manifest = ensure_columnar_cache(csv_path)
+    return manifest['rows'] if manifest is not None else None
+
+
+def _project(columns, available):
+    if columns is None:
+        return None
+    return [col for col in columns if col in available]
+
+
+def iter_month_frames(csv_path, columns=None, months=None):
+    """
+    Yields (month, DataFrame) pairs in chronological order, reading only the requested columns.
+    Rows inside a month are grouped by station, sort by timestamp if you need them chronological.
+    """
+    manifest = ensure_columnar_cache(csv_path)
+    if manifest is None:
+        # Without pyarrow there is no cache to stream from, fall back to one pass over the CSV
+        df = pd.concat(read_csv_chunks(csv_path, columns=columns), ignore_index=True)
+        yield None, df
+        return
+
+    cache_dir = get_cache_dir(csv_path)
+    projection = _project(columns, manifest['columns'])
+    for entry in manifest['months']:
+        if months is not None and entry['month'] not in months:
+            continue
+        path = os.path.join(cache_dir, f"{entry['month']}.feather")
+        table = feather.read_table(path, columns=projection, memory_map=True)
+        yield entry['month'], table.to_pandas()
+
+
+def load_telemetry(csv_path, columns=None, last_n_rows=None):
+    """
+    Loads the telemetry dataset (sorted by timestamp) from the columnar cache.
+    `columns` limits which columns are read from disk, `last_n_rows` skips any month that
+    lies entirely before the most recent N rows.
+    """
+    manifest = ensure_columnar_cache(csv_path)
+    if manifest is None:
+        df = pd.concat(read_csv_chunks(csv_path, columns=columns), ignore_index=True)
+        return df.sort_values('timestamp', kind='stable', na_position='first') if 'timestamp' in df.columns else df
+
+    months = None
+    if last_n_rows is not None:
+        months = set()
+        remaining = last_n_rows
+        for entry in reversed(manifest['months']):
+            if remaining <= 0:
+                break
+            months.add(entry['month'])
+            remaining -= entry['rows']
+
+    frames = [frame for _, frame in iter_month_frames(csv_path, columns=columns, months=months)]
+    if not frames:
+        return pd.DataFrame(columns=_project(columns, manifest['columns']) or manifest['columns'])
+    df = pd.concat(frames, ignore_index=True)
+    if 'timestamp' in df.columns:
+        # Undated rows first, where the cache's undated partition (and so the streaming trainer) puts them
+        df = df.sort_values('timestamp', kind='stable', ignore_index=True, na_position='first')
+    return df
+
+
+def _read_station_index(csv_path):
+    manifest = ensure_columnar_cache(csv_path)
+    if manifest is None:
+        return None
+    path = os.path.join(get_cache_dir(csv_path), STATION_INDEX_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame({'station_id': [], 'month': [], 'offset': [], 'length': []})
+    return feather.read_feather(path)
+
+
+def list_station_ids(csv_path):
+    """Returns every station_id in the dataset, from the station index when the cache is available."""
+    station_index = _read_station_index(csv_path)
+    if station_index is None:
+        return pd.read_csv(csv_path, usecols=['station_id'], dtype={'station_id': 'object'})['station_id'].unique()
+    return station_index['station_id'].unique()
+
+
+def load_station_rows(csv_path, station_ids, columns=None):
+    """
+    Loads only the rows belonging to `station_ids`, sorted by timestamp.
+    Each station's rows are sliced out of the memory-mapped month files using the station index,
+    so the cost scales with the number of requested stations rather than the size of the dataset.
+    """
+    station_index = _read_station_index(csv_path)
+    if station_index is None:
+        df = pd.concat(read_csv_chunks(csv_path, columns=columns), ignore_index=True)
+        df = df[df['station_id'].isin(station_ids)]
+        return df.sort_values('timestamp', kind='stable', ignore_index=True, na_position='first')
+
+    manifest = _read_manifest(get_cache_dir(csv_path))
+    projection = _project(columns, manifest['columns'])
+    wanted = station_index[station_index['station_id'].isin(station_ids)]
+
+    tables = []
+    for month_key, ranges in wanted.groupby('month', sort=True):
+        path = os.path.join(get_cache_dir(csv_path), f"{month_key}.feather")
+        # Memory mapping means only the pages backing the requested slices are ever read
+        month_table = feather.read_table(path, columns=projection, memory_map=True)
+        for offset, length in zip(ranges['offset'].to_numpy(), ranges['length'].to_numpy()):
+            tables.append(month_table.slice(int(offset), int(length)))
+
+    if not tables:
+        return pd.DataFrame(columns=projection or manifest['columns'])
+    df = pa.concat_tables(tables).to_pandas()
+    if 'timestamp' in df.columns:
+        df = df.sort_values('timestamp', kind='stable', ignore_index=True, na_position='first')
+    return df
+
+
+# Compact in-memory representation used by the API's DataManager
+SENSOR_COLUMNS = [
+    'power_output_kw', 'utilization_rate', 'estimated_wait_time_mins', 'avg_session_duration_mins',
+    'temperature_f', 'precipitation_mm', 'gas_price_per_gallon', 'traffic_congestion_index'
+]
+SMALL_INT_COLUMNS = {
+    'hour_of_day': 'int8', 'day_of_week': 'int8', 'month': 'int8',
+    'ports_total': 'int16', 'ports_available': 'int16', 'ports_occupied': 'int16', 'ports_out_of_service': 'int16'
+}
+CATEGORICAL_MAX_RATIO = 0.5
+
+
+def _memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def compact_frame(df, name='frame'):
+    """
+    Shrinks a telemetry DataFrame in place of the default object/float64/int64 columns:
+    low-cardinality strings become categoricals, sensor readings float32 and calendar/port
+    counters small ints. Prints the memory footprint before and after.
+    """
+    before = _memory_mb(df)
+    df = df.copy()
+    
+    for col in df.columns:
+        series = df[col]
+        if col in SENSOR_COLUMNS and pd.api.types.is_float_dtype(series):
+            df[col] = series.astype('float32')
+        elif col in SMALL_INT_COLUMNS and pd.api.types.is_numeric_dtype(series) and not series.isna().any():
+            df[col] = series.astype(SMALL_INT_COLUMNS[col])
+        elif col in BOOL_COLUMNS and str(series.dtype) == 'boolean' and not series.isna().any():
+            df[col] = series.astype(bool)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if len(series) > 0 and series.nunique() <= CATEGORICAL_MAX_RATIO * len(series):
+                df[col] = series.astype('category')
+    
+    after = _memory_mb(df)
+    print(f"Compacted {name}: {before:.2f} MB -> {after:.2f} MB ({len(df)} rows)")
+    return df
+
+
+FLOAT32_SIGNIFICANT_DIGITS = 7
+
+
+def widen_float32(values):
+    """
+    Converts float32 values to float64 rounded to float32's ~7 significant digits,
+    so a stored 0.45 comes back as 0.45 instead of 0.449999988079071.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    magnitude = np.where(np.isfinite(magnitude), magnitude, 0)
+    scale = 10.0 ** (FLOAT32_SIGNIFICANT_DIGITS - 1 - magnitude)
+    return np.round(values * scale) / scale
+
+
+def float64_values(values):
+    """
+    Column values as float64 for arithmetic. Compacted float32 readings are widened first, so
+    derived values are computed from the CSV's decimals rather than their float32 approximations.
+    """
+    values = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+    if values.dtype == np.float32:
+        return widen_float32(values)
+    return values.astype(np.float64)
+
+
+def expand_compact_dtypes(df):
+    """Undoes compact_frame for serialization: categoricals back to plain objects and float32 widened to float64."""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        elif df[col].dtype == 'float32':
+            df[col] = widen_float32(df[col].to_numpy())
+    return df
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from compiled_forest import CompiledForest
+
+def fit_small_forest(seed=0):
+    """A tiny forest on synthetic data with missing values, so trees learn where NaN goes."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(600, 5)).astype(np.float32)
+    y = np.where(X[:, 0] + X[:, 1] > 0.5, 'offline', np.where(X[:, 2] > 0, 'operational', 'partial_outage'))
+    X[rng.random(X.shape) < 0.1] = np.nan
+    forest = RandomForestClassifier(n_estimators=15, max_depth=6, random_state=seed).fit(X, y)
+    return forest, X
+
+def edge_rows(forest, X):
+    """Holdout-like rows plus rows sitting exactly on split thresholds and rows with missing values."""
+    rng = np.random.default_rng(1)
+    rows = [X[:200]]
+
+    # One row per split of the first tree, with that split's feature exactly on its threshold (as
+    # float32, like the model input); splits that only separate missing values have an infinite threshold
+    tree = forest.estimators_[0].tree_
+    split = (tree.feature >= 0) & np.isfinite(tree.threshold)
+    on_threshold = X[:split.sum()].copy()
+    on_threshold[np.arange(split.sum()), tree.feature[split]] = tree.threshold[split].astype(np.float32)
+    rows.append(on_threshold)
+
+    with_missing = rng.normal(size=(200, X.shape[1])).astype(np.float32)
+    with_missing[rng.random(with_missing.shape) < 0.3] = np.nan
+    with_missing[:5] = np.nan  # all features missing
+    rows.append(with_missing)
+    return np.vstack(rows)
+
+def assert_matches_sklearn(forest, compiled, X):
+    labels, proba = compiled.predict_with_proba(X)
+    assert np.array_equal(labels, forest.predict(X)), "labels differ from sklearn"
+    assert np.abs(proba - forest.predict_proba(X)).max() < 1e-12, "probabilities differ from sklearn"
+    assert np.array_equal(compiled.classes_, forest.classes_)
+
+def test_matches_sklearn():
+    forest, X = fit_small_forest()
+    assert_matches_sklearn(forest, CompiledForest.from_sklearn(forest), edge_rows(forest, X))
+
+def test_matches_sklearn_after_npz_round_trip():
+    forest, X = fit_small_forest()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'compiled_forest.npz')
+        CompiledForest.from_sklearn(forest).save(path)
+        assert_matches_sklearn(forest, CompiledForest.load(path), edge_rows(forest, X))
+
+if __name__ == "__main__":
+    test_matches_sklearn()
+    test_matches_sklearn_after_npz_round_trip()
+    print("CompiledForest matches sklearn, before and after the npz round trip.")
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from main import load_and_preprocess_data, build_encoded_feature_matrix, load_encoded_feature_matrix
+
+def write_telemetry_csv(path, num_rows=3000, undated_frac=0.02, seed=0):
+    """A small telemetry CSV over three months, shuffled, with a fraction of blank timestamps."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', '2024-03-31 23:00', periods=num_rows).strftime('%Y-%m-%d %H:%M:%S').to_numpy(dtype=object)
+    timestamps[rng.random(num_rows) < undated_frac] = ''
+    df = pd.DataFrame({
+        'station_id': [f"ST-{i % 40:05d}" for i in range(num_rows)],
+        'timestamp': timestamps,
+        'network': rng.choice(['ChargePoint', 'EVgo', 'Tesla'], num_rows),
+        'utilization_rate': rng.random(num_rows).round(3),
+        'temperature_f': rng.normal(70, 15, num_rows).round(1),
+        # Row number as a feature, so any difference in row order shows up in X
+        'ports_total': np.arange(num_rows),
+        'station_status': rng.choice(['operational', 'offline', 'partial_outage'], num_rows)
+    })
+    df.iloc[rng.permutation(num_rows)].to_csv(path, index=False)
+
+def check_same_order(sample_frac):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'telemetry.csv')
+        write_telemetry_csv(csv_path)
+
+        X_memory, y_memory, _ = load_and_preprocess_data(csv_path, sample_frac=sample_frac)
+        matrix_dir, _ = build_encoded_feature_matrix(csv_path, sample_frac=sample_frac, out_dir=os.path.join(tmp, 'features'))
+        X_stream, y_stream = load_encoded_feature_matrix(matrix_dir)
+
+        assert list(X_memory.columns) == list(X_stream.columns)
+        assert np.array_equal(X_memory.to_numpy(dtype=np.float32), X_stream.to_numpy(dtype=np.float32)), \
+            "in-memory and streaming training rows are in a different order"
+        assert np.array_equal(y_memory.astype(str).to_numpy(), y_stream.astype(str).to_numpy())
+
+def test_full_dataset_order_matches_streaming():
+    check_same_order(sample_frac=1.0)
+
+def test_sampled_order_matches_streaming():
+    check_same_order(sample_frac=0.5)
+
+if __name__ == "__main__":
+    test_full_dataset_order_matches_streaming()
+    test_sampled_order_matches_streaming()
+    print("In-memory and streaming training see the same rows in the same order.")